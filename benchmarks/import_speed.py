@@ -0,0 +1,87 @@
+"""
+Measure how fast lists are imported from CSV and JSON files.
+
+Generates a file of each format with random items (the same for every run),
+then reports the best of several full imports, and of merging re-imports of
+the unchanged file into lists imported from it before:
+
+    PYTHONPATH=src python benchmarks/import_speed.py --items 200000
+"""
+import argparse
+import datetime
+import functools
+import pathlib
+import random
+import tempfile
+import time
+from collections.abc import Callable
+
+from python_gui_sample.logic import TODOLogic
+from python_gui_sample.model import TODOItem, TODOList
+from python_gui_sample.serializers import CSVSerializer, JSONSerializer, serializer_for
+
+TAGS = ["work", "home", "urgent", "later", "shopping", "family"]
+
+
+def generate(items: int, lists: int) -> dict:
+    random.seed(1)
+    start = datetime.datetime(2025, 1, 1)
+    data = {}
+    for n in range(lists):
+        lst = TODOList(title=f"List {n}", description="Benchmark")
+        for m in range(items // lists):
+            lst.add_item(TODOItem(
+                title=f"Item {m}",
+                description="Description",
+                # Creation times are nearly all distinct, due and completion dates repeat
+                created_at=start + datetime.timedelta(seconds=random.randrange(10**7),
+                                                      microseconds=random.randrange(10**6)),
+                completed_at=(start + datetime.timedelta(days=random.randrange(60))
+                              if random.random() < 0.5 else None),
+                due_at=(start + datetime.timedelta(days=random.randrange(90))
+                        if random.random() < 0.7 else None),
+                priority=random.randrange(6),
+                tags=set(random.sample(TAGS, random.randrange(3))),
+            ))
+        data[lst.identifier] = lst
+    return data
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        # Freeing the result is not part of the run
+        result = run()
+        times.append(time.perf_counter() - started)
+        del result
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--lists", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5, help="report the best of this many runs")
+    args = parser.parse_args()
+
+    data = generate(args.items, args.lists)
+    total = sum(len(lst.items) for lst in data.values())
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [pathlib.Path(directory) / "todos.csv", pathlib.Path(directory) / "todos.json"]
+        CSVSerializer().export_data(data, paths[0])
+        JSONSerializer().export_data(data, paths[1])
+        del data
+        for path in paths:
+            full = best_of(args.repeat, functools.partial(serializer_for(path).import_data, path))
+            logic = TODOLogic()
+            logic.import_lists(path)
+            merge = best_of(args.repeat, functools.partial(logic.import_lists, path, merge=True))
+            # The lists of one format must not slow down the runs of the next
+            del logic
+            print(f"{path.suffix[1:]:>4}: import {full:.3f} s ({total / full:,.0f} items/s), "
+                  f"merging re-import {merge:.3f} s ({total / merge:,.0f} items/s)")
+
+
+if __name__ == "__main__":
+    main()
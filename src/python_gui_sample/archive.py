@@ -0,0 +1,196 @@
+import base64
+import datetime
+import json
+import pathlib
+import threading
+import uuid
+import zlib
+
+from .model import TODOItem
+from .serializers.json_serializer import item_to_dict, items_from_dicts
+
+# This file contains the cold store for archived items. Completed items that
+# are old enough are moved out of TODOList.items (the hot path scanned by every
+# operation and GUI refresh) into compressed segments, one or more per list.
+# Every archiving run appends a new zlib-compressed segment of JSON lines, so
+# archiving does not touch older segments (unless it replaces an archived copy
+# of the same item); they are only decompressed when archived items are listed,
+# restored or exported. Only the identifiers are kept uncompressed. If a path is given, the
+# store is also kept in that file and loaded from it on start.
+#
+# Items restored on demand are remembered with their completion time, automatic
+# archiving skips them until they are completed again (or deleted).
+
+
+class ArchiveStore:
+    """
+    Compressed segments of archived items per list.
+    """
+
+    def __init__(self, path: pathlib.Path | None = None):
+        self.path = pathlib.Path(path) if path else None
+        self._segments: dict[uuid.UUID, list[bytes]] = {}
+        self._identifiers: dict[uuid.UUID, set[uuid.UUID]] = {}
+        self._kept: dict[uuid.UUID, dict[uuid.UUID, datetime.datetime | None]] = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self.load()
+
+    @staticmethod
+    def _encode(items: list[TODOItem]) -> bytes:
+        lines = "\n".join(json.dumps(item_to_dict(item), separators=(",", ":")) for item in items)
+        return zlib.compress(lines.encode("utf-8"))
+
+    @staticmethod
+    def _decode(segment: bytes) -> list[TODOItem]:
+        lines = zlib.decompress(segment).decode("utf-8").splitlines()
+        return items_from_dicts([json.loads(line) for line in lines])
+
+    def add(self, list_identifier: uuid.UUID, items: list[TODOItem]):
+        """Archive the items as a new segment of the list (replacing older copies)."""
+        if not items:
+            return
+        replaced = self.identifiers(list_identifier) & {item.identifier for item in items}
+        if replaced:
+            self.restore(list_identifier, replaced)
+        segment = self._encode(items)
+        with self._lock:
+            self._segments.setdefault(list_identifier, []).append(segment)
+            self._identifiers.setdefault(list_identifier, set()).update(
+                item.identifier for item in items
+            )
+        self._persist()
+
+    def count(self, list_identifier: uuid.UUID | None = None) -> int:
+        """Number of archived items of the list (or of all lists)."""
+        with self._lock:
+            if list_identifier is None:
+                return sum(len(ids) for ids in self._identifiers.values())
+            return len(self._identifiers.get(list_identifier, ()))
+
+    def identifiers(self, list_identifier: uuid.UUID) -> set[uuid.UUID]:
+        """Identifiers of archived items of the list (without decompressing them)."""
+        with self._lock:
+            return set(self._identifiers.get(list_identifier, ()))
+
+    def items(self, list_identifier: uuid.UUID) -> list[TODOItem]:
+        """Decompress and return all archived items of the list."""
+        with self._lock:
+            segments = list(self._segments.get(list_identifier, []))
+        return [item for segment in segments for item in self._decode(segment)]
+
+    def kept(self, list_identifier: uuid.UUID) -> dict[uuid.UUID, datetime.datetime | None]:
+        """Completion times of the items of the list restored with keep=True."""
+        with self._lock:
+            return dict(self._kept.get(list_identifier, {}))
+
+    def forget_kept(self, list_identifier: uuid.UUID, item_identifiers: set[uuid.UUID]):
+        """Let the items of the list be archived again."""
+        with self._lock:
+            kept = self._kept.get(list_identifier, {})
+            removed = [kept.pop(identifier) for identifier in item_identifiers
+                       if identifier in kept]
+            if not kept:
+                self._kept.pop(list_identifier, None)
+        if removed:
+            self._persist()
+
+    def restore(self, list_identifier: uuid.UUID, item_identifiers: set[uuid.UUID] | None = None,
+                keep: bool = False) -> list[TODOItem]:
+        """
+        Remove the given (or all) items of the list from the archive and return them.
+
+        With keep=True the items are remembered as kept active (see kept).
+        """
+        with self._lock:
+            segments = self._segments.pop(list_identifier, [])
+            items = [item for segment in segments for item in self._decode(segment)]
+            restored = [item for item in items
+                        if item_identifiers is None or item.identifier in item_identifiers]
+            kept = [item for item in items
+                    if item_identifiers is not None and item.identifier not in item_identifiers]
+            if kept:
+                self._segments[list_identifier] = [self._encode(kept)]
+                self._identifiers[list_identifier] = {item.identifier for item in kept}
+            else:
+                self._identifiers.pop(list_identifier, None)
+            if keep and restored:
+                self._kept.setdefault(list_identifier, {}).update(
+                    (item.identifier, item.completed_at) for item in restored
+                )
+        if restored:
+            self._persist()
+        return restored
+
+    def drop(self, *list_identifiers: uuid.UUID, forget_kept: bool = True):
+        """Forget all archived items of the lists (and which items are kept active)."""
+        removed = False
+        with self._lock:
+            for list_identifier in list_identifiers:
+                removed = self._segments.pop(list_identifier, None) is not None or removed
+                self._identifiers.pop(list_identifier, None)
+                if forget_kept:
+                    removed = self._kept.pop(list_identifier, None) is not None or removed
+        if removed:
+            self._persist()
+
+    def clear(self):
+        """Forget all archived items."""
+        with self._lock:
+            removed = bool(self._segments or self._kept)
+            self._segments.clear()
+            self._identifiers.clear()
+            self._kept.clear()
+        if removed:
+            self._persist()
+
+    def _file(self) -> pathlib.Path:
+        if self.path is None:
+            raise ValueError("The archive is not kept in a file")
+        return self.path
+
+    def _persist(self):
+        if self.path:
+            self.save()
+
+    def save(self):
+        """Write the segments (still compressed) to the archive file."""
+        path = self._file()
+        with self._lock:
+            data = {
+                str(key): {
+                    "identifiers": [str(identifier)
+                                    for identifier in self._identifiers.get(key, ())],
+                    "segments": [base64.b64encode(segment).decode("ascii")
+                                 for segment in self._segments.get(key, ())],
+                    "kept": {str(identifier): completed_at and completed_at.isoformat()
+                             for identifier, completed_at in self._kept.get(key, {}).items()},
+                } for key in self._segments.keys() | self._kept.keys()
+            }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        tmp_path.replace(path)
+
+    def load(self):
+        """Read the segments from the archive file."""
+        with open(self._file(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        with self._lock:
+            # Lists with kept items only have no segments
+            self._segments = {
+                uuid.UUID(key): [base64.b64decode(segment) for segment in value["segments"]]
+                for key, value in data.items() if value["segments"]
+            }
+            self._identifiers = {
+                uuid.UUID(key): {uuid.UUID(identifier) for identifier in value["identifiers"]}
+                for key, value in data.items() if value["segments"]
+            }
+            # Files written before items could be kept active have no "kept"
+            self._kept = {
+                uuid.UUID(key): {
+                    uuid.UUID(identifier): completed_at and datetime.datetime.fromisoformat(
+                        completed_at)
+                    for identifier, completed_at in value["kept"].items()
+                } for key, value in data.items() if value.get("kept")
+            }
@@ -0,0 +1,185 @@
+import argparse
+import contextlib
+import csv
+import lzma
+import os
+import pathlib
+import sys
+import time
+import zlib
+from collections.abc import Iterable, Iterator
+
+from .logic import TODOLogic
+from .query import QueryError, compile_query
+from .serializers import Record, serializer_for
+
+# This file contains the headless command line interface for batch jobs. It
+# uses only TODOLogic and the serializers (never Qt or Tk), so it runs on
+# servers without a display. convert and query stream records from the input
+# to the output one by one, so memory does not grow with the file size. merge
+# has to keep everything in memory to match lists and items by identifier.
+#
+# Outputs are written to a temporary file next to the target, which replaces the
+# target only once it is complete: a failed run leaves an existing file intact.
+# An output must not be one of the inputs, it would be truncated while read.
+#
+# Exit codes: 0 on success, 1 when a query matched no items, 2 on invalid
+# usage (including invalid queries) and 3 when a file cannot be read or written
+# or is corrupt.
+
+EXIT_OK = 0
+EXIT_NO_MATCH = 1
+EXIT_USAGE = 2
+EXIT_ERROR = 3
+
+
+class UsageError(Exception):
+    pass
+
+
+class _Counter:
+    """
+    Pass records through while counting them (for the throughput report).
+    """
+
+    def __init__(self, records: Iterable[Record]):
+        self.records = records
+        self.count = 0
+
+    def __iter__(self) -> Iterator[Record]:
+        for record in self.records:
+            if record[1] is not None:
+                self.count += 1
+            yield record
+
+
+def _filtered(records: Iterable[Record], where: str | None) -> Iterable[Record]:
+    if not where:
+        return records
+    predicate = compile_query(where)
+    return (record for record in records
+            if record[1] is not None and predicate(record[0], record[1]))
+
+
+@contextlib.contextmanager
+def _atomic_output(output: pathlib.Path, inputs: list[pathlib.Path]):
+    """Yield a temporary path to write to, which replaces the output on success."""
+    for path in inputs:
+        if output.exists() and output.samefile(path):
+            raise UsageError(f"Output {output} is also an input")
+    # The name ends like the output's, so the format and compression are the same
+    temporary = output.with_name(f".tmp-{os.getpid()}-{output.name}")
+    try:
+        yield temporary
+        temporary.replace(output)
+    finally:
+        temporary.unlink(missing_ok=True)
+
+
+def _report(args, action: str, items: int, started: float, inputs: list[pathlib.Path]):
+    if args.quiet:
+        return
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    size = sum(path.stat().st_size for path in inputs)
+    print(f"{action} {items} items in {elapsed:.3f} s "
+          f"({items / elapsed:,.0f} items/s, {size / elapsed / 1e6:,.1f} MB/s read)",
+          file=sys.stderr)
+
+
+def cmd_convert(args) -> int:
+    started = time.perf_counter()
+    records = _Counter(serializer_for(args.input).iter_records(args.input))
+    with _atomic_output(args.output, [args.input]) as output:
+        serializer_for(output).write_records(_filtered(records, args.where), output)
+    _report(args, "Converted", records.count, started, [args.input])
+    return EXIT_OK
+
+
+def cmd_query(args) -> int:
+    started = time.perf_counter()
+    records = _Counter(serializer_for(args.input).iter_records(args.input))
+    matched = 0
+    if args.output:
+        def counted(matches):
+            nonlocal matched
+            for record in matches:
+                # Lists without items are passed on but are not matches
+                if record[1] is not None:
+                    matched += 1
+                yield record
+        with _atomic_output(args.output, [args.input]) as output:
+            serializer_for(output).write_records(counted(_filtered(records, args.where)),
+                                                 output)
+    else:
+        for tdl, item in _filtered(records, args.where):
+            if item is None:
+                continue
+            matched += 1
+            if not args.count:
+                due = item.due_at.isoformat() if item.due_at else ""
+                print("\t".join([tdl.title, item.title, str(item.priority), due,
+                                 "done" if item.is_completed else "open"]))
+    if args.count:
+        print(matched)
+    _report(args, f"Matched {matched} of", records.count, started, [args.input])
+    return EXIT_OK if matched else EXIT_NO_MATCH
+
+
+def cmd_merge(args) -> int:
+    started = time.perf_counter()
+    with _atomic_output(args.output, args.inputs) as output:
+        logic = TODOLogic()
+        logic.import_lists(args.inputs[0])
+        for path in args.inputs[1:]:
+            # Later files win, nothing that is missing in them is deleted
+            logic.merge_lists(serializer_for(path).import_data(path), prune=False)
+        logic.export_lists(output)
+    _report(args, "Merged", logic.total_stats().total, started, args.inputs)
+    return EXIT_OK
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="pygui-cli",
+        description="Convert, query and merge TODO list files (CSV or JSON, "
+                    "optionally compressed with .gz, .bz2 or .xz)",
+    )
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="do not report timing and throughput on stderr")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="stream-convert a file to another format")
+    convert.add_argument("input", type=pathlib.Path)
+    convert.add_argument("output", type=pathlib.Path)
+    convert.add_argument("-w", "--where", help="keep only items matching the query")
+    convert.set_defaults(handler=cmd_convert)
+
+    query = subparsers.add_parser("query", help="print or export items matching a query")
+    query.add_argument("input", type=pathlib.Path)
+    query.add_argument("-w", "--where", help="query, e.g. \"priority <= 1 and not completed\"")
+    query.add_argument("-o", "--output", type=pathlib.Path,
+                       help="write matching items to this file instead of printing them")
+    query.add_argument("-c", "--count", action="store_true",
+                       help="print only the number of matching items")
+    query.set_defaults(handler=cmd_query)
+
+    merge = subparsers.add_parser("merge", help="merge files by identifier (later files win)")
+    merge.add_argument("inputs", type=pathlib.Path, nargs="+")
+    merge.add_argument("-o", "--output", type=pathlib.Path, required=True)
+    merge.set_defaults(handler=cmd_merge)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = create_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (QueryError, UsageError) as e:
+        print(f"pygui-cli: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    # Corrupt input: zlib.error and LZMAError come from damaged compressed data,
+    # csv.Error from a malformed CSV and TypeError from JSON values of the wrong type
+    except (OSError, EOFError, ValueError, KeyError, TypeError,
+            zlib.error, lzma.LZMAError, csv.Error) as e:
+        print(f"pygui-cli: {type(e).__name__}: {e}", file=sys.stderr)
+        return EXIT_ERROR
@@ -0,0 +1,158 @@
+import collections
+import enum
+import gc
+import sys
+import tracemalloc
+from collections.abc import Callable, Iterable
+
+from .model import TODOList, TODOItem
+
+# This file contains memory diagnostics usable without any GUI (e.g. from tests
+# or scripts) and from the Debug menu of the PySide front-end:
+#
+# - item_bytes() / list_bytes() estimate how much memory the model objects take,
+#   memory_report() summarises it per list for a TODOLogic,
+# - live_object_counts() counts live objects of the model (and Qt model) classes
+#   tracked by the garbage collector,
+# - MemoryTracker diffs tracemalloc snapshots between checkpoints (e.g. between
+#   two table refreshes) and soak() repeats an action to check memory is bounded.
+
+# Classes counted by live_object_counts() by default
+TRACKED_TYPES = (
+    "TODOItem", "TODOList", "ListStats",
+    "QStandardItemModel", "QStandardItem", "QItemSelectionModel",
+)
+
+
+def _deep_size(obj, seen: set[int]) -> int:
+    # Enum members (e.g. UUID.is_safe) are shared singletons
+    if id(obj) in seen or isinstance(obj, enum.Enum):
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (set, frozenset, list, tuple)):
+        size += sum(_deep_size(element, seen) for element in obj)
+    elif isinstance(obj, dict):
+        size += sum(_deep_size(k, seen) + _deep_size(v, seen) for k, v in obj.items())
+    elif not isinstance(obj, type):
+        if hasattr(obj, "__dict__"):
+            size += _deep_size(obj.__dict__, seen)
+        for name in getattr(type(obj), "__slots__", ()):
+            size += _deep_size(getattr(obj, name, None), seen)
+    return size
+
+
+def item_bytes(item: TODOItem, seen: set[int] | None = None) -> int:
+    """Estimate the memory taken by the item including its field values."""
+    seen = set() if seen is None else seen
+    # The statistics are owned by the list, do not count them per item
+    seen.add(id(item.__dict__.get("_stats")))
+    return _deep_size(item, seen)
+
+
+def list_bytes(lst: TODOList, seen: set[int] | None = None) -> int:
+    """Estimate the memory taken by the list including its items and statistics."""
+    seen = set() if seen is None else seen
+    # The totals over all lists are not part of the list
+    seen.add(id(lst.stats.parent))
+    seen.add(id(lst.stats.lock))
+    return _deep_size(lst, seen)
+
+
+def memory_report(logic) -> dict:
+    """Per-list and total memory estimates of the lists held by the logic."""
+    seen: set[int] = set()
+    lists = []
+    for lst in logic.lists():
+        lists.append({
+            "identifier": lst.identifier,
+            "title": lst.title,
+            "items": len(lst.items),
+            "bytes": list_bytes(lst, seen),
+            "archived": logic.archived_count(lst.identifier),
+        })
+    total = sum(entry["bytes"] for entry in lists)
+    items = sum(entry["items"] for entry in lists)
+    return {
+        "lists": lists,
+        "total_bytes": total,
+        "total_items": items,
+        "bytes_per_item": total / items if items else 0.0,
+        "archived": logic.archived_count(),
+    }
+
+
+def format_report(report: dict) -> str:
+    lines = [f"Total: {report['total_bytes'] / 1024:,.1f} KiB in {report['total_items']} items "
+             f"({report['bytes_per_item']:,.0f} B/item), archived items: {report['archived']}"]
+    for entry in sorted(report["lists"], key=lambda e: e["bytes"], reverse=True):
+        lines.append(f"  {entry['title']}: {entry['bytes'] / 1024:,.1f} KiB, "
+                     f"{entry['items']} items, {entry['archived']} archived")
+    return "\n".join(lines)
+
+
+def live_object_counts(type_names: Iterable[str] = TRACKED_TYPES) -> dict[str, int]:
+    """Count live objects of the given class names known to the garbage collector."""
+    wanted = set(type_names)
+    counts: collections.Counter = collections.Counter({name: 0 for name in wanted})
+    gc.collect()
+    for obj in gc.get_objects():
+        name = type(obj).__name__
+        if name in wanted:
+            counts[name] += 1
+    return dict(counts)
+
+
+class MemoryTracker:
+    """
+    Diffs of tracemalloc snapshots between checkpoints.
+    """
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self.started_tracing = False
+        self.snapshot: tracemalloc.Snapshot | None = None
+
+    def start(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.started_tracing = True
+        self.snapshot = self._take()
+        return self.snapshot
+
+    def stop(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        self.snapshot = None
+
+    @staticmethod
+    def _take() -> tracemalloc.Snapshot:
+        gc.collect()
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+
+    def checkpoint(self, limit: int = 10) -> tuple[int, list[tracemalloc.StatisticDiff]]:
+        """Return the total growth in bytes and the top differences since the last checkpoint."""
+        previous = self.snapshot if self.snapshot is not None else self.start()
+        self.snapshot = self._take()
+        diffs = self.snapshot.compare_to(previous, "lineno")
+        return sum(diff.size_diff for diff in diffs), diffs[:limit]
+
+    def soak(self, action: Callable[[], object], cycles: int = 10000, warmup: int = 100) -> int:
+        """Run the action repeatedly and return the memory growth (bytes) after warm-up."""
+        for _ in range(warmup):
+            action()
+        self.checkpoint()
+        for _ in range(cycles):
+            action()
+        growth, _ = self.checkpoint()
+        return growth
+
+
+def format_diffs(growth: int, diffs: list[tracemalloc.StatisticDiff]) -> str:
+    lines = [f"Growth since last snapshot: {growth / 1024:+,.1f} KiB"]
+    lines.extend(f"  {diff}" for diff in diffs)
+    return "\n".join(lines)
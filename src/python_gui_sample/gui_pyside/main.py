@@ -3,24 +3,48 @@ import pathlib
 import sys
 import uuid
 
-from PySide6.QtCore import QFile, QItemSelection
+from PySide6.QtCore import (QFile, QItemSelection, QItemSelectionModel, QObject, Qt, QTimer,
+                            Signal)
 from PySide6.QtWidgets import (QApplication, QWidget, QAbstractItemView,
                                QSpinBox, QDialog, QVBoxLayout, QLabel,
-                               QLineEdit, QDialogButtonBox)
+                               QLineEdit, QDialogButtonBox, QMessageBox, QListWidget,
+                               QListWidgetItem)
 from PySide6.QtGui import QStandardItemModel, QStandardItem
 from PySide6.QtUiTools import QUiLoader
 
+from .. import diagnostics
 from ..logic import TODOLogic
+from ..model import ListStats
+from ..scheduler import due_message
+from ..service import TODOClient, create_logic
 
 UI_DIR = pathlib.Path(__file__).parent / "ui"
+# QTimer intervals are 32-bit milliseconds
+MAX_TIMER_MS = 2**31 - 1
+# How often old completed items are moved to the archive
+ARCHIVE_INTERVAL_MS = 60 * 60 * 1000
+# Changes made by other clients of the TODO service are refreshed together
+REMOTE_REFRESH_MS = 100
+
+
+def _format_priorities(stats: ListStats) -> str:
+    priorities = sorted(stats.priorities.items())
+    return ", ".join(f"P{priority}: {count}" for priority, count in priorities)
+
+
+class _ChangeNotifier(QObject):
+    # Carries events of the TODO service from its thread to the GUI thread
+    changed = Signal()
+    due = Signal()
 
 
 class ListWindow:
 
-    def __init__(self, parent: QWidget, logic: TODOLogic):
+    def __init__(self, parent: QWidget, logic: TODOLogic | TODOClient, on_change=None):
         self.parent = parent
         self.logic = logic
-        self.list_id = None
+        self.on_change = on_change
+        self.list_id: uuid.UUID | None = None
 
         ui_file = QFile(UI_DIR / "list_window.ui")
         ui_file.open(QFile.ReadOnly)
@@ -28,17 +52,27 @@ class ListWindow:
         self.window = loader.load(ui_file)
         ui_file.close()
 
+        self._setup_table()
+        self._setup_actions()
+
     def _setup_table(self):
         # Set up table view: model, selection mode, etc.
         table = self.window.tableView
         table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        # The model is reused by every refresh, setting a new one would leave
+        # the previous selection model (owned by the view) and connection behind
+        self.model = QStandardItemModel(self.window)
+        self.model.setHorizontalHeaderLabels(["Title", "Priority", "Tags", "Due"])
+        table.setModel(self.model)
+        table.selectionModel().selectionChanged.connect(self._on_selection_changed)
 
     def _setup_actions(self):
         self.window.actionNew.triggered.connect(self._on_new_item)
         self.window.actionEdit.triggered.connect(self._on_edit_item)
         self.window.actionDelete.triggered.connect(self._on_delete_item)
         self.window.actionEditList.triggered.connect(self._on_edit_list)
+        self.window.actionArchived.triggered.connect(self._on_archived)
         self.window.actionClose.triggered.connect(self._on_close)
 
         # Initially disable these actions
@@ -56,12 +90,14 @@ class ListWindow:
         self.window.show()
 
     def _refresh_table(self):
+        list_id = self.list_id
+        if list_id is None:
+            return
         table = self.window.tableView
-        todo_list = self.logic.get_list(self.list_id)
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(["Title", "Priority", "Tags", "Due"])
+        model = self.model
+        model.setRowCount(0)
 
-        for item in todo_list.items:
+        for item in self.logic.items(list_id):
             row = [
                 QStandardItem(item.title),
                 QStandardItem(str(item.priority)),
@@ -71,12 +107,12 @@ class ListWindow:
             row[0].setData(str(item.identifier))  # store UUID
             model.appendRow(row)
 
-        table.setModel(model)
         table.resizeColumnsToContents()
-        table.selectionModel().selectionChanged.connect(self._on_selection_changed)
 
         # Disable item actions until a row is selected
         self._on_selection_changed(None, None)
+        if self.on_change:
+            self.on_change()
 
     def _on_selection_changed(self, selected: QItemSelection, deselected: QItemSelection):
         table = self.window.tableView
@@ -85,6 +121,9 @@ class ListWindow:
         self.window.actionDelete.setEnabled(has)
 
     def _on_new_item(self):
+        list_id = self.list_id
+        if list_id is None:
+            return
         dialog = QDialog(self.window)
         dialog.setWindowTitle("New TODO Item")
 
@@ -129,7 +168,7 @@ class ListWindow:
                     due_at = None  # you could show an error message if desired
 
             self.logic.add_item(
-                self.list_id,
+                list_id,
                 title=title,
                 description=description,
                 priority=priority,
@@ -145,17 +184,15 @@ class ListWindow:
         dialog.exec()
 
     def _on_edit_item(self):
+        list_id = self.list_id
         table = self.window.tableView
         index = table.selectionModel().currentIndex()
-        if not index.isValid():
+        if list_id is None or not index.isValid():
             return
 
-        row = index.row()
-        uuid_str = table.model().item(row, 0).data()
-        item_uuid = uuid.UUID(uuid_str)
+        item_uuid = uuid.UUID(table.model().item(index.row(), 0).data())
 
-        lst = self.logic.get_list(self.list_id)
-        item = next((i for i in lst.items if i.identifier == item_uuid), None)
+        item = next((i for i in self.logic.items(list_id) if i.identifier == item_uuid), None)
         if not item:
             return
 
@@ -204,7 +241,7 @@ class ListWindow:
                     new_due_at = None  # optionally show error
 
             self.logic.update_item(
-                self.list_id,
+                list_id,
                 item_uuid,
                 title=new_title,
                 description=new_desc,
@@ -221,17 +258,21 @@ class ListWindow:
         dialog.exec()
 
     def _on_delete_item(self):
+        list_id = self.list_id
         table = self.window.tableView
         index = table.selectionModel().currentIndex()
-        if not index.isValid():
+        if list_id is None or not index.isValid():
             return
         row = index.row()
         uuid_str = table.model().item(row, 0).data()
-        self.logic.delete_item(self.list_id, uuid.UUID(uuid_str))
+        self.logic.delete_item(list_id, uuid.UUID(uuid_str))
         self._refresh_table()
 
     def _on_edit_list(self):
-        todo_list = self.logic.get_list(self.list_id)
+        list_id = self.list_id
+        if list_id is None:
+            return
+        todo_list = self.logic.get_list(list_id)
 
         if todo_list is None:
             return
@@ -257,7 +298,7 @@ class ListWindow:
             new_title = title_input.text().strip()
             new_desc = desc_input.text().strip()
             if new_title:
-                self.logic.update_list(self.list_id, new_title, new_desc)
+                self.logic.update_list(list_id, new_title, new_desc)
                 self._refresh_table()
                 dialog.accept()
 
@@ -266,18 +307,60 @@ class ListWindow:
 
         dialog.exec()
 
+    def _on_archived(self):
+        list_id = self.list_id
+        if list_id is None:
+            return
+        dialog = QDialog(self.window)
+        dialog.setWindowTitle("Archived Items")
+
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(QLabel("Restored items are no longer archived automatically."))
+        items_list = QListWidget()
+        items_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        for item in self.logic.archived_items(list_id):
+            completed = item.completed_at.isoformat(" ", "minutes") if item.completed_at else ""
+            entry = QListWidgetItem(f"{item.title} (completed {completed})")
+            entry.setData(Qt.ItemDataRole.UserRole, str(item.identifier))
+            items_list.addItem(entry)
+        layout.addWidget(items_list)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        restore = buttons.addButton("Restore", QDialogButtonBox.ButtonRole.AcceptRole)
+        restore.setEnabled(False)
+        items_list.itemSelectionChanged.connect(
+            lambda: restore.setEnabled(bool(items_list.selectedItems())))
+        layout.addWidget(buttons)
+
+        def accept():
+            selected = {uuid.UUID(entry.data(Qt.ItemDataRole.UserRole))
+                        for entry in items_list.selectedItems()}
+            if selected:
+                self.logic.restore_archived(list_id, selected)
+                self._refresh_table()
+            dialog.accept()
+
+        buttons.accepted.connect(accept)
+        buttons.rejected.connect(dialog.reject)
+
+        dialog.exec()
+
+    def refresh(self):
+        if self.list_id is not None:
+            self._refresh_table()
+
     def _on_close(self):
         self.window.hide()
         self.list_id = None
         self.window.labelTitle.setText("--")
         self.window.labelDescription.setText("--")
-        self.window.tableView.setModel(QStandardItemModel())
+        self.model.setRowCount(0)
 
 
 class TODOPySideApp:
 
-    def __init__(self):
-        self.logic = TODOLogic()
+    def __init__(self, logic: TODOLogic | TODOClient | None = None):
+        self.logic = logic or TODOLogic()
         self.app = QApplication(sys.argv)
 
         ui_file = QFile(UI_DIR / "main_window.ui")
@@ -285,16 +368,29 @@ class TODOPySideApp:
         loader = QUiLoader(self.app)
         self.window = loader.load(ui_file)
         ui_file.close()
-        self.item_window = ListWindow(self.window, self.logic)
+        self.item_window = ListWindow(self.window, self.logic, self._refresh_table)
 
         self._setup_table()
         self._setup_actions()
+        self._setup_due_timer()
+        self._setup_archive_timer()
+        self._setup_debug_menu()
+        self._setup_service_events()
 
     def _setup_table(self):
         # Set up table view: model, selection mode, etc.
         table = self.window.tableView
         table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        # One model for the whole session, see ListWindow._setup_table
+        self.model = QStandardItemModel(self.window)
+        self.model.setHorizontalHeaderLabels(["UUID", "Title", "Description", "Open", "Completed",
+                                              "Overdue", "Next Due", "Open by Priority"])
+        table.setModel(self.model)
+        table.selectionModel().selectionChanged.connect(self._on_selection_changed)
+        # Totals over all lists are shown permanently in the status bar
+        self.totals_label = QLabel()
+        self.window.statusbar.addPermanentWidget(self.totals_label)
 
     def _setup_actions(self):
         self.window.actionNew.triggered.connect(self._on_new_list)
@@ -310,6 +406,94 @@ class TODOPySideApp:
         self.window.actionDelete.setEnabled(False)
         self.window.actionOpen.setEnabled(False)
 
+    def _setup_due_timer(self):
+        # A single-shot timer that wakes up only when the next item comes due
+        self.due_timer = QTimer(self.window)
+        self.due_timer.setSingleShot(True)
+        self.due_timer.timeout.connect(self._on_due)
+        self._schedule_due_timer()
+
+    def _schedule_due_timer(self):
+        # The TODO service fires due items itself and pushes them (see _setup_service_events)
+        if isinstance(self.logic, TODOClient):
+            return
+        next_due = self.logic.next_due_at()
+        if next_due is None:
+            self.due_timer.stop()
+            return
+        delay = (next_due - datetime.datetime.now()).total_seconds() * 1000
+        self.due_timer.start(int(min(max(delay, 0), MAX_TIMER_MS)))
+
+    def _on_due(self):
+        due = self.logic.fire_due()
+        if due:
+            QMessageBox.information(self.window, "TODO Items Due", due_message(due))
+        self._schedule_due_timer()
+
+    def _setup_archive_timer(self):
+        self.archive_timer = QTimer(self.window)
+        self.archive_timer.timeout.connect(self._on_archive)
+        self.archive_timer.start(ARCHIVE_INTERVAL_MS)
+
+    def _on_archive(self):
+        if self.logic.archive_completed():
+            self._refresh_table()
+
+    def _setup_service_events(self):
+        # Lists shared through the TODO service may be changed by other clients
+        if not isinstance(self.logic, TODOClient):
+            return
+        self.remote_timer = QTimer(self.window)
+        self.remote_timer.setSingleShot(True)
+        self.remote_timer.setInterval(REMOTE_REFRESH_MS)
+        self.remote_timer.timeout.connect(self._on_remote_change)
+        self.notifier = _ChangeNotifier()
+        self.notifier.changed.connect(self.remote_timer.start, Qt.ConnectionType.QueuedConnection)
+        self.notifier.due.connect(self._on_due, Qt.ConnectionType.QueuedConnection)
+        self.logic.subscribe(self._on_service_event)
+
+    def _on_service_event(self, op, _list_identifier):
+        # Runs in the event thread of the client, only signals are safe here
+        if op == "due":
+            self.notifier.due.emit()
+        else:
+            self.notifier.changed.emit()
+
+    def _on_remote_change(self):
+        if self.item_window.list_id is not None:
+            # Refreshes this table too (on_change)
+            self.item_window.refresh()
+        else:
+            self._refresh_table()
+
+    def _setup_debug_menu(self):
+        self.memory_tracker = diagnostics.MemoryTracker()
+        menu = self.window.menubar.addMenu("&Debug")
+        menu.addAction("Memory Report...").triggered.connect(self._on_memory_report)
+        self.action_track_memory = menu.addAction("Track Memory per Refresh")
+        self.action_track_memory.setCheckable(True)
+        self.action_track_memory.toggled.connect(self._on_track_memory)
+
+    def _on_memory_report(self):
+        counts = diagnostics.live_object_counts()
+        tables = [self.window.tableView, self.item_window.window.tableView]
+        # Selection models are C++ children of the views, invisible to the Python GC
+        counts["QItemSelectionModel"] = sum(len(table.findChildren(QItemSelectionModel))
+                                            for table in tables)
+        text = diagnostics.format_report(diagnostics.memory_report(self.logic))
+        text += "\n\nLive objects:\n" + "\n".join(
+            f"  {name}: {count}" for name, count in sorted(counts.items())
+        )
+        if self.memory_tracker.snapshot is not None:
+            text += "\n\n" + diagnostics.format_diffs(*self.memory_tracker.checkpoint())
+        QMessageBox.information(self.window, "Memory Report", text)
+
+    def _on_track_memory(self, enabled: bool):
+        if enabled:
+            self.memory_tracker.start()
+        else:
+            self.memory_tracker.stop()
+
     def _on_selection_changed(self, selected: QItemSelection, deselected: QItemSelection):
         has_selection = self.window.tableView.selectionModel().hasSelection()
         self.window.actionEdit.setEnabled(has_selection)
@@ -425,37 +609,62 @@ class TODOPySideApp:
         from PySide6.QtWidgets import QFileDialog
         path, _ = QFileDialog.getOpenFileName(self.window, "Import TODOs")
         if path:
-            self.logic.import_lists(pathlib.Path(path))
+            # Merge so that lists which are already open keep their state
+            summary = self.logic.import_lists(pathlib.Path(path), merge=True)
             self._refresh_table()
+            if summary is not None:
+                self.window.statusbar.showMessage(
+                    f"Imported: {summary.items_added} added, {summary.items_updated} updated, "
+                    f"{summary.items_removed} removed, {summary.items_unchanged} unchanged"
+                )
 
     def _on_export(self):
         from PySide6.QtWidgets import QFileDialog
         path, _ = QFileDialog.getSaveFileName(self.window, "Export TODOs")
         if path:
-            self.logic.export_lists(pathlib.Path(path))
+            self.logic.export_lists(pathlib.Path(path), include_archive=True)
 
     def _on_clear(self):
-        self.logic.todo_lists.clear()
+        self.logic.clear_lists()
         self._refresh_table()
 
     def _refresh_table(self):
-        model = QStandardItemModel()
-        model.setHorizontalHeaderLabels(["UUID", "Title", "Description"])
+        model = self.model
+        model.setRowCount(0)
 
-        for tdl in self.logic.todo_lists.values():
+        now = datetime.datetime.now()
+        for tdl in self.logic.list_summaries():
+            stats = tdl.stats
+            next_due = stats.next_due(now)
             row = [
                 QStandardItem(str(tdl.identifier)),
                 QStandardItem(tdl.title),
-                QStandardItem(tdl.description)
+                QStandardItem(tdl.description),
+                QStandardItem(str(stats.open)),
+                QStandardItem(str(stats.completed)),
+                QStandardItem(str(stats.overdue(now))),
+                QStandardItem(next_due.isoformat(" ", "minutes") if next_due else ""),
+                QStandardItem(_format_priorities(stats))
             ]
             row[0].setData(str(tdl.identifier))  # store UUID
             model.appendRow(row)
 
-        self.window.tableView.setModel(model)
         self.window.tableView.resizeColumnsToContents()
 
-        self.window.tableView.selectionModel().selectionChanged.connect(self._on_selection_changed)
         self._on_selection_changed(None, None)
+        self._schedule_due_timer()
+
+        totals = self.logic.total_stats()
+        self.totals_label.setText(
+            f"Open: {totals.open}, completed: {totals.completed}, "
+            f"overdue: {totals.overdue(now)}, by priority: {_format_priorities(totals) or '-'}, "
+            f"archived: {self.logic.archived_count()}"
+        )
+        if self.memory_tracker.snapshot is not None:
+            growth, _ = self.memory_tracker.checkpoint(limit=0)
+            self.window.statusbar.showMessage(
+                f"Memory since last refresh: {growth / 1024:+,.1f} KiB"
+            )
 
     def run(self):
         # Show the main window
@@ -468,5 +677,5 @@ class TODOPySideApp:
 
 
 def main():
-    app = TODOPySideApp()
+    app = TODOPySideApp(create_logic())
     return app.run()
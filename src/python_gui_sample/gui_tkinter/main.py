@@ -1,19 +1,38 @@
+import datetime
 import pathlib
+import threading
 import tkinter as tk
 from tkinter import ttk, simpledialog, messagebox, filedialog
 from uuid import UUID
 
 from ..logic import TODOLogic
+from ..scheduler import due_message
+from ..service import TODOClient, create_logic
+
+# Tk accepts only 32-bit millisecond delays in after()
+MAX_AFTER_MS = 2**31 - 1
+# How often old completed items are moved to the archive
+ARCHIVE_INTERVAL_MS = 60 * 60 * 1000
+# How often changes made by other clients of the TODO service are checked for
+REMOTE_POLL_MS = 250
 
 
 class TODOTkinterApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, logic: TODOLogic | TODOClient | None = None):
         super().__init__()
         self.title("TODO Manager")
         self.geometry("600x400")
-        self.logic = TODOLogic()
+        self.logic = logic or TODOLogic()
         self.selected_list_id: UUID | None = None
+        self.due_after_id: str | None = None
         self.create_widgets()
+        self.schedule_due_check()
+        self.after(ARCHIVE_INTERVAL_MS, self.archive_completed)
+        self.remote_changed = threading.Event()
+        self.remote_due = threading.Event()
+        if isinstance(self.logic, TODOClient):
+            self.logic.subscribe(self.on_service_event)
+            self.after(REMOTE_POLL_MS, self.poll_remote_changes)
 
     def create_widgets(self):
         self.listbox = tk.Listbox(self)
@@ -32,13 +51,58 @@ class TODOTkinterApp(tk.Tk):
 
     def refresh(self):
         self.listbox.delete(0, tk.END)
-        for lst in self.logic.todo_lists.values():
+        for lst in self.logic.list_summaries():
             self.listbox.insert(tk.END, f"{lst.title} - {lst.description}")
+        self.schedule_due_check()
+
+    def schedule_due_check(self):
+        # Wake up only when the next item comes due instead of polling. The TODO
+        # service fires due items itself and pushes them (see on_service_event).
+        if isinstance(self.logic, TODOClient):
+            return
+        if self.due_after_id is not None:
+            self.after_cancel(self.due_after_id)
+            self.due_after_id = None
+        next_due = self.logic.next_due_at()
+        if next_due is not None:
+            delay = (next_due - datetime.datetime.now()).total_seconds() * 1000
+            self.due_after_id = self.after(int(min(max(delay, 0), MAX_AFTER_MS)), self.on_due)
+
+    def on_due(self):
+        self.due_after_id = None
+        due = self.logic.fire_due()
+        if due:
+            messagebox.showinfo("TODO Items Due", due_message(due))
+        self.schedule_due_check()
+
+    def on_service_event(self, op, _list_identifier):
+        # Tk must not be touched from the service thread, so this only sets flags
+        if op == "due":
+            self.remote_due.set()
+        else:
+            self.remote_changed.set()
+
+    def poll_remote_changes(self):
+        if self.remote_due.is_set():
+            self.remote_due.clear()
+            self.on_due()
+        if self.remote_changed.is_set():
+            self.remote_changed.clear()
+            self.refresh()
+            for window in self.winfo_children():
+                if isinstance(window, ItemWindow):
+                    window.refresh()
+        self.after(REMOTE_POLL_MS, self.poll_remote_changes)
+
+    def archive_completed(self):
+        if self.logic.archive_completed():
+            self.refresh()
+        self.after(ARCHIVE_INTERVAL_MS, self.archive_completed)
 
     def on_select(self, event):
         sel = self.listbox.curselection()
         if sel:
-            all_uuids = list(self.logic.todo_lists.keys())
+            all_uuids = [lst.identifier for lst in self.logic.list_summaries()]
             self.selected_list_id = all_uuids[sel[0]]
 
     def add_list(self):
@@ -52,8 +116,12 @@ class TODOTkinterApp(tk.Tk):
         if not self.selected_list_id:
             return
         lst = self.logic.get_list(self.selected_list_id)
+        if lst is None:
+            return
         title = simpledialog.askstring("Edit Title", "Enter new title:", initialvalue=lst.title)
         desc = simpledialog.askstring("Edit Description", "Enter new desc:", initialvalue=lst.description)
+        if title is None or desc is None:
+            return
         self.logic.update_list(self.selected_list_id, title, desc)
         self.refresh()
 
@@ -72,21 +140,28 @@ class TODOTkinterApp(tk.Tk):
     def export_lists(self):
         path = filedialog.asksaveasfilename(defaultextension=".json")
         if path:
-            self.logic.export_lists(pathlib.Path(path))
+            self.logic.export_lists(pathlib.Path(path), include_archive=True)
             messagebox.showinfo("Export", "Lists exported successfully.")
 
     def import_lists(self):
-        path = filedialog.askopenfilename(filetypes=[("JSON", "*.json")])
+        path = filedialog.askopenfilename(filetypes=[("JSON", "*.json"), ("CSV", "*.csv"),
+                                                     ("Compressed", "*.gz *.bz2 *.xz")])
         if path:
-            self.logic.import_lists(pathlib.Path(path))
+            summary = self.logic.import_lists(pathlib.Path(path), merge=True)
             self.refresh()
-            messagebox.showinfo("Import", "Lists imported successfully.")
+            if summary is not None:
+                messagebox.showinfo("Import", f"Lists imported successfully.\n"
+                                              f"Items added: {summary.items_added}, "
+                                              f"updated: {summary.items_updated}, "
+                                              f"removed: {summary.items_removed}, "
+                                              f"unchanged: {summary.items_unchanged}")
 
 
 class ItemWindow(tk.Toplevel):
-    def __init__(self, parent, logic, list_id: UUID):
+    def __init__(self, parent: TODOTkinterApp, logic, list_id: UUID):
         super().__init__(parent)
         selected_list = logic.get_list(list_id)
+        self.app = parent
         self.logic = logic
         self.list_id = list_id
         self.title(f"TODO Items: {selected_list.title}")
@@ -97,14 +172,15 @@ class ItemWindow(tk.Toplevel):
         self.toolbar.pack(fill=tk.X)
         tk.Button(self.toolbar, text="Add Item", command=self.add_item).pack(side=tk.LEFT)
         tk.Button(self.toolbar, text="Delete Item", command=self.delete_item).pack(side=tk.LEFT)
+        tk.Button(self.toolbar, text="Archived", command=self.show_archived).pack(side=tk.RIGHT)
         self.refresh()
 
     def refresh(self):
         self.itembox.delete(0, tk.END)
-        lst = self.logic.get_list(self.list_id)
-        for item in lst.items:
+        for item in self.logic.items(self.list_id):
             self.itembox.insert(tk.END, f"[{item.priority}] {item.title} - {', '.join(item.tags)} "
                                         f"(Due: {item.due_at.strftime('%Y-%m-%d') if item.due_at else 'N/A'})")
+        self.app.schedule_due_check()
 
     def add_item(self):
         title = simpledialog.askstring("Title", "Enter item title:")
@@ -114,8 +190,7 @@ class ItemWindow(tk.Toplevel):
         due_at = simpledialog.askstring("Due Date", "Enter due date (YYYY-MM-DD):")
         if due_at:
             try:
-                from datetime import datetime
-                due_at = datetime.strptime(due_at, "%Y-%m-%d")
+                due_at = datetime.datetime.strptime(due_at, "%Y-%m-%d")
             except ValueError:
                 messagebox.showerror("Invalid Date", "Please enter a valid date in YYYY-MM-DD format.")
                 return
@@ -132,12 +207,43 @@ class ItemWindow(tk.Toplevel):
     def delete_item(self):
         sel = self.itembox.curselection()
         if sel:
-            lst = self.logic.get_list(self.list_id)
-            item = lst.items[sel[0]]
+            item = self.logic.items(self.list_id)[sel[0]]
             self.logic.delete_item(self.list_id, item.identifier)
             self.refresh()
 
+    def show_archived(self):
+        ArchiveWindow(self, self.logic, self.list_id)
+
+
+class ArchiveWindow(tk.Toplevel):
+    # Archived items of a list; restored ones are no longer archived automatically
+    def __init__(self, parent: ItemWindow, logic, list_id: UUID):
+        super().__init__(parent)
+        self.item_window = parent
+        self.logic = logic
+        self.list_id = list_id
+        self.title("Archived Items")
+        self.geometry("500x300")
+        self.itembox = tk.Listbox(self, selectmode=tk.EXTENDED)
+        self.itembox.pack(fill=tk.BOTH, expand=True)
+        toolbar = tk.Frame(self)
+        toolbar.pack(fill=tk.X)
+        tk.Button(toolbar, text="Restore", command=self.restore).pack(side=tk.LEFT)
+        tk.Button(toolbar, text="Close", command=self.destroy).pack(side=tk.RIGHT)
+        self.items = self.logic.archived_items(self.list_id)
+        for item in self.items:
+            completed = item.completed_at.strftime("%Y-%m-%d") if item.completed_at else "N/A"
+            self.itembox.insert(tk.END, f"{item.title} (Completed: {completed})")
+
+    def restore(self):
+        sel = self.itembox.curselection()
+        if sel:
+            self.logic.restore_archived(self.list_id,
+                                        {self.items[index].identifier for index in sel})
+            self.item_window.refresh()
+            self.destroy()
+
 
 def main():
-    app = TODOTkinterApp()
+    app = TODOTkinterApp(create_logic())
     app.mainloop()
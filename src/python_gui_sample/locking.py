@@ -0,0 +1,84 @@
+import contextlib
+import threading
+
+# This file contains the synchronization primitives used by TODOLogic when it is
+# shared between threads (e.g. GUI thread editing while a worker imports, saves
+# or queries). The standard library offers only exclusive locks, so a simple
+# reader/writer lock is implemented here: many readers may hold it at once,
+# writers are exclusive and waiting writers take precedence over new readers
+# so a steady stream of readers cannot starve them.
+
+
+class ReadWriteLock:
+    """
+    A reader/writer lock with writer preference.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    def acquire_read(self):
+        """Acquire the lock for shared (read) access."""
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+
+    def release_read(self):
+        """Release a shared (read) hold of the lock."""
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        """Acquire the lock for exclusive (write) access."""
+        with self._cond:
+            self._writers_waiting += 1
+            try:
+                while self._writer or self._readers:
+                    self._cond.wait()
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+
+    def release_write(self):
+        """Release an exclusive (write) hold of the lock."""
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def read_locked(self):
+        """Context manager holding the lock for reading."""
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextlib.contextmanager
+    def write_locked(self):
+        """Context manager holding the lock for writing."""
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class NullLock:
+    """
+    A no-op stand-in for ReadWriteLock used when thread safety is not needed.
+    """
+
+    def read_locked(self):
+        """Return a context manager that does nothing."""
+        return contextlib.nullcontext()
+
+    def write_locked(self):
+        """Return a context manager that does nothing."""
+        return contextlib.nullcontext()
@@ -1,8 +1,15 @@
+import contextlib
+import dataclasses
+import datetime
 import pathlib
+import threading
 import uuid
 
-from .model import TODOList, TODOItem
-from .serializers import CSVSerializer, JSONSerializer
+from .archive import ArchiveStore
+from .locking import NullLock, ReadWriteLock
+from .model import ListStats, ListSummary, TODOList, TODOItem
+from .scheduler import DueScheduler
+from .serializers import serializer_for
 
 # This file contains the logic for managing lists and items.
 # The TODOLogic class is responsible for handling operations and acts as a facade
@@ -10,59 +17,406 @@ from .serializers import CSVSerializer, JSONSerializer
 # lists and items, as well as to mark items as completed or incomplete. It is
 # agnostic to the GUI framework and can be used with any GUI toolkit (or even with
 # other types of interfaces, such as a command line interface).
+#
+# When created with thread_safe=True, every list gets its own reader/writer lock
+# and the mapping of lists is guarded by a registry lock. Readers never block each
+# other, edits lock only the list they touch, and exports copy one list (with its
+# items) at a time so a long export does not stall edits on other lists. Use
+# items() and snapshot() to read items: they return copies taken under the list's
+# read lock. lists() and get_list() return the live lists, whose items may change
+# while being read; list_summaries() returns copies of the titles and statistics
+# only, which is all an overview of the lists needs.
+#
+# The logic also keeps the DueScheduler up to date with every change, so callers
+# can ask for next_due_at() and fire_due() instead of scanning all items. Item
+# counts are maintained the same way: every list has its ListStats and the logic
+# keeps the totals over all lists, updated in O(1) as items change.
+#
+# With archive_after set, completed items older than that are moved from the
+# lists to the ArchiveStore by archive_completed() (run after imports and
+# periodically by the front-ends), so everyday operations only see active items.
+# Archived items can be listed and restored, and exports can include them.
 
-class TODOLogic:
+@dataclasses.dataclass
+class MergeSummary:
+    """
+    Changes applied by a merge import.
+    """
+    lists_added: int = 0
+    lists_updated: int = 0
+    lists_removed: int = 0
+    items_added: int = 0
+    items_updated: int = 0
+    items_removed: int = 0
+    items_unchanged: int = 0
 
-    def __init__(self):
+
+ITEM_CONTENT_FIELDS = tuple(f.name for f in dataclasses.fields(TODOItem) if f.name != "identifier")
+
+
+def _copy_items(lst: TODOList) -> list[TODOItem]:
+    # Called with the list's read lock held. Items are copied too, update_item
+    # changes them field by field
+    return [dataclasses.replace(item, tags=set(item.tags)) for item in lst.items]
+
+
+class TODOLogic:  # pylint: disable=too-many-public-methods
+
+    def __init__(self, thread_safe: bool = False,
+                 archive_after: datetime.timedelta | None = None,
+                 archive_path: pathlib.Path | None = None):
+        self.thread_safe = thread_safe
+        self.archive_after = archive_after
+        self.archive = ArchiveStore(archive_path)
+        self._lock_factory = ReadWriteLock if thread_safe else NullLock
+        self._registry_lock = self._lock_factory()
+        self._list_locks: dict[uuid.UUID, ReadWriteLock | NullLock] = {}
         self.todo_lists: dict[uuid.UUID, TODOList] = {}
+        self.scheduler = DueScheduler()
+        self.stats = self._new_stats()
+
+    def _locked(self, identifier: uuid.UUID):
+        # Look up the list and its lock under the registry lock, the caller then
+        # takes the per-list lock without holding the registry one
+        with self._registry_lock.read_locked():
+            lst, lock = self.todo_lists.get(identifier), self._list_locks.get(identifier)
+        if lst is not None and lock is None:
+            # The list was put into todo_lists directly, give it a lock lazily
+            with self._registry_lock.write_locked():
+                lock = self._list_locks.setdefault(identifier, self._lock_factory())
+        return lst, lock
+
+    def _new_stats(self) -> ListStats:
+        # Lists are edited under their own locks, so the shared totals need one
+        return ListStats(lock=threading.Lock() if self.thread_safe else contextlib.nullcontext())
+
+    def _attach_stats(self, lst: TODOList):
+        # Reading statistics updates them (see ListStats.overdue), so with
+        # concurrent readers of a list its statistics need a lock of their own
+        if self.thread_safe:
+            lst.stats.lock = threading.Lock()
+        lst.stats.attach(self.stats)
 
     def create_list(self, title, description):
         new_list = TODOList(title=title, description=description)
-        self.todo_lists[new_list.identifier] = new_list
+        with self._registry_lock.write_locked():
+            self.todo_lists[new_list.identifier] = new_list
+            self._list_locks[new_list.identifier] = self._lock_factory()
+            self._attach_stats(new_list)
         return new_list
 
     def delete_list(self, identifier: uuid.UUID):
-        del self.todo_lists[identifier]
+        with self._registry_lock.write_locked():
+            lst = self.todo_lists.pop(identifier)
+            self._list_locks.pop(identifier, None)
+            lst.stats.detach()
+        self.archive.drop(identifier)
+        for item in lst.items:
+            self.scheduler.cancel(item.identifier, identifier)
+
+    def clear_lists(self):
+        with self._registry_lock.write_locked():
+            for lst in self.todo_lists.values():
+                lst.stats.parent = None
+            self.todo_lists.clear()
+            self._list_locks.clear()
+            self.scheduler.clear()
+            self.stats = self._new_stats()
+        self.archive.clear()
 
     def update_list(self, identifier: uuid.UUID, title: str, description: str):
-        if identifier in self.todo_lists:
-            lst = self.todo_lists[identifier]
-            lst.title = title
-            lst.description = description
+        lst, lock = self._locked(identifier)
+        if lst is not None:
+            with lock.write_locked():
+                lst.title = title
+                lst.description = description
 
     def get_list(self, identifier: uuid.UUID) -> TODOList | None:
-        return self.todo_lists.get(identifier)
+        # The live list, read its items through items()
+        with self._registry_lock.read_locked():
+            return self.todo_lists.get(identifier)
+
+    def lists(self) -> list[TODOList]:
+        with self._registry_lock.read_locked():
+            return list(self.todo_lists.values())
+
+    def list_summaries(self) -> list[ListSummary]:
+        with self._registry_lock.read_locked():
+            keys = list(self.todo_lists)
+        summaries = []
+        for key in keys:
+            lst, lock = self._locked(key)
+            if lst is None:
+                continue
+            with lock.read_locked():
+                summaries.append(ListSummary(lst.identifier, lst.title, lst.description,
+                                             lst.stats.copy()))
+        return summaries
+
+    def read_locked(self, list_identifier: uuid.UUID):
+        # Hold the read lock of a list, e.g. to serialize a list or item handed out live
+        _, lock = self._locked(list_identifier)
+        return lock.read_locked() if lock is not None else contextlib.nullcontext()
+
+    def items(self, list_identifier: uuid.UUID) -> list[TODOItem]:
+        lst, lock = self._locked(list_identifier)
+        if lst is None:
+            return []
+        with lock.read_locked():
+            return _copy_items(lst)
+
+    def snapshot(self) -> dict[uuid.UUID, TODOList]:
+        with self._registry_lock.read_locked():
+            keys = list(self.todo_lists)
+        result = {}
+        for key in keys:
+            lst, lock = self._locked(key)
+            if lst is None:
+                continue
+            with lock.read_locked():
+                result[lst.identifier] = dataclasses.replace(lst, items=_copy_items(lst))
+        return result
 
     def add_item(self, list_identifier, **item_kwargs):
-        if list_identifier in self.todo_lists:
+        lst, lock = self._locked(list_identifier)
+        if lst is not None:
             item = TODOItem(**item_kwargs)
-            self.todo_lists[list_identifier].items.append(item)
+            with lock.write_locked():
+                lst.add_item(item)
+            self.scheduler.schedule(list_identifier, item)
+            return item
+        return None
 
     def delete_item(self, list_identifier: uuid.UUID, item_identifier: uuid.UUID):
-        if list_identifier in self.todo_lists:
-            lst = self.todo_lists[list_identifier]
-            item = next((it for it in lst.items if it.identifier == item_identifier), None)
-            if item:
-                lst.items.remove(item)
+        lst, lock = self._locked(list_identifier)
+        if lst is not None:
+            with lock.write_locked():
+                item = next((it for it in lst.items if it.identifier == item_identifier), None)
+                if item:
+                    lst.remove_item(item)
+                    self.scheduler.cancel(item_identifier, list_identifier)
 
     def update_item(self, list_identifier: uuid.UUID, item_identifier: uuid.UUID, **kwargs):
-        if list_identifier in self.todo_lists:
-            lst = self.todo_lists[list_identifier]
-            item = next((it for it in lst.items if it.identifier == item_identifier), None)
-            if item:
-                for key, value in kwargs.items():
-                    setattr(item, key, value)
-
-    def export_lists(self, filepath: pathlib.Path):
+        lst, lock = self._locked(list_identifier)
+        if lst is not None:
+            with lock.write_locked():
+                item = next((it for it in lst.items if it.identifier == item_identifier), None)
+                if item:
+                    for key, value in kwargs.items():
+                        setattr(item, key, value)
+                    self.scheduler.schedule(list_identifier, item)
+
+    def mark_completed(self, list_identifier: uuid.UUID, item_identifier: uuid.UUID):
+        lst, lock = self._locked(list_identifier)
+        if lst is not None:
+            with lock.write_locked():
+                item = next((it for it in lst.items if it.identifier == item_identifier), None)
+                if item:
+                    item.mark_completed()
+                    self.scheduler.cancel(item_identifier, list_identifier)
+
+    def mark_incomplete(self, list_identifier: uuid.UUID, item_identifier: uuid.UUID):
+        lst, lock = self._locked(list_identifier)
+        if lst is not None:
+            with lock.write_locked():
+                item = next((it for it in lst.items if it.identifier == item_identifier), None)
+                if item:
+                    item.mark_incomplete()
+                    self.scheduler.schedule(list_identifier, item)
+
+    def total_stats(self) -> ListStats:
+        return self.stats
+
+    def check_stats(self):
+        # Compare the incremental statistics with a full recompute (for tests)
+        with self._registry_lock.read_locked():
+            lists = list(self.todo_lists.values())
+        for lst in lists:
+            lst.check_stats()
+        expected = ListStats.from_items([item for lst in lists for item in lst.items])
+        if self.stats != expected:
+            raise ValueError(f"Total statistics are inconsistent: {self.stats} != {expected}")
+
+    def next_due_at(self) -> datetime.datetime | None:
+        return self.scheduler.next_due()
+
+    def fire_due(self, now: datetime.datetime | None = None) -> list[tuple[uuid.UUID, TODOItem]]:
+        # Returns the items that came due (and notifies the scheduler callbacks)
+        return self.scheduler.fire_due(now)
+
+    def archive_completed(self, now: datetime.datetime | None = None) -> int:
+        # Move items completed before now - archive_after to the archive. Items
+        # restored on demand are kept until they are completed again
+        if self.archive_after is None:
+            return 0
+        cutoff = (now or datetime.datetime.now()) - self.archive_after
+        archived = 0
+        for lst in self.lists():
+            _, lock = self._locked(lst.identifier)
+            kept = self.archive.kept(lst.identifier)
+            with lock.write_locked():
+                if kept:
+                    current = {item.identifier: item.completed_at for item in lst.items}
+                    stale = {identifier for identifier, completed_at in kept.items()
+                             if identifier not in current or current[identifier] != completed_at}
+                    if stale:
+                        self.archive.forget_kept(lst.identifier, stale)
+                old = [item for item in lst.items
+                       if item.completed_at is not None and item.completed_at < cutoff
+                       and (item.identifier not in kept
+                            or kept[item.identifier] != item.completed_at)]
+                if not old:
+                    continue
+                lst.retain_items({item.identifier for item in lst.items} -
+                                 {item.identifier for item in old})
+            self.archive.add(lst.identifier, old)
+            archived += len(old)
+        return archived
+
+    def archived_count(self, list_identifier: uuid.UUID | None = None) -> int:
+        return self.archive.count(list_identifier)
+
+    def archived_items(self, list_identifier: uuid.UUID) -> list[TODOItem]:
+        return self.archive.items(list_identifier)
+
+    def restore_archived(self, list_identifier: uuid.UUID,
+                         item_identifiers: set[uuid.UUID] | None = None,
+                         keep: bool = True) -> int:
+        # Bring the given (or all) archived items of the list back to it. With
+        # keep=True archive_completed leaves them alone until completed again
+        lst, lock = self._locked(list_identifier)
+        if lst is None:
+            return 0
+        restored = self.archive.restore(list_identifier, item_identifiers, keep=keep)
+        with lock.write_locked():
+            for item in restored:
+                lst.add_item(item)
+                self.scheduler.schedule(list_identifier, item)
+        return len(restored)
+
+    def export_lists(self, filepath: pathlib.Path, include_archive: bool = False):
         if filepath:
-            if filepath.name.endswith(".csv"):
-                CSVSerializer().export_data(self.todo_lists, filepath)
-            else:
-                JSONSerializer().export_data(self.todo_lists, filepath)
+            data = self.snapshot() if self.thread_safe or include_archive else self.todo_lists
+            if include_archive:
+                for key, lst in data.items():
+                    if self.archive.count(key):
+                        lst.items.extend(self.archive.items(key))
+            serializer_for(filepath).export_data(data, filepath)
 
-    def import_lists(self, filepath: pathlib.Path):
+    def import_lists(self, filepath: pathlib.Path, merge: bool = False,
+                     prune: bool = True) -> MergeSummary | None:
+        # With merge=True the existing lists and items are kept and only the
+        # differences are applied (see merge_lists), otherwise all is replaced
         if filepath:
-            if filepath.name.endswith(".csv"):
-                self.todo_lists = CSVSerializer().import_data(filepath)
+            if merge:
+                todo_lists = serializer_for(filepath).import_data(filepath,
+                                                                  known=self._imported_items())
+                summary = self.merge_lists(todo_lists, prune=prune)
+                self.archive_completed()
+                return summary
+            todo_lists = serializer_for(filepath).import_data(filepath)
+            # Archived items of the lists in the file are replaced by the file's
+            # (exports include them), archives of other lists are kept. Which
+            # restored items are kept active is remembered, archive_completed
+            # forgets those the file does not have
+            self.archive.drop(*todo_lists, forget_kept=False)
+            with self._registry_lock.write_locked():
+                self.todo_lists = todo_lists
+                self._list_locks = {key: self._lock_factory() for key in todo_lists}
+                self.scheduler.clear()
+                self.stats = self._new_stats()
+                for key, lst in todo_lists.items():
+                    self._attach_stats(lst)
+                    for item in lst.items:
+                        self.scheduler.schedule(key, item)
+            self.archive_completed()
+        return None
+
+    def _imported_items(self) -> dict[int, TODOItem]:
+        # Items unchanged since they were imported, by the hash of their record.
+        # A merging import does not decode such records again, it puts the
+        # existing item in the incoming list.
+        known = {}
+        for lst in self.lists():
+            with self.read_locked(lst.identifier):
+                for item in lst.items:
+                    record_hash = item.record_hash
+                    if record_hash is not None:
+                        known[record_hash] = item
+        return known
+
+    def merge_lists(self, incoming: dict[uuid.UUID, TODOList],
+                    prune: bool = True) -> MergeSummary:
+        # Lists and items are matched by identifier. Existing objects are updated
+        # in place so references held elsewhere (e.g. by GUIs) stay valid, items
+        # that are unchanged (the existing item itself, see import_lists, or one
+        # with the same content hash) are skipped, and with prune=True lists and
+        # items missing in the incoming data are deleted.
+        summary = MergeSummary()
+        with self._registry_lock.write_locked():
+            for key, new_list in incoming.items():
+                if key not in self.todo_lists:
+                    self.todo_lists[key] = new_list
+                    self._list_locks[key] = self._lock_factory()
+                    self._attach_stats(new_list)
+                    summary.lists_added += 1
+                    summary.items_added += len(new_list.items)
+                    for item in new_list.items:
+                        self.scheduler.schedule(key, item)
+            if prune:
+                for key in [key for key in self.todo_lists if key not in incoming]:
+                    removed = self.todo_lists.pop(key)
+                    self._list_locks.pop(key, None)
+                    removed.stats.detach()
+                    self.archive.drop(key)
+                    summary.lists_removed += 1
+                    summary.items_removed += len(removed.items)
+                    for item in removed.items:
+                        self.scheduler.cancel(item.identifier, key)
+            existing = [
+                (self.todo_lists[key], self._list_locks.setdefault(key, self._lock_factory()),
+                 new_list)
+                for key, new_list in incoming.items() if self.todo_lists[key] is not new_list
+            ]
+        for lst, lock, new_list in existing:
+            # Archived items present in the incoming data are merged like active
+            # ones (and archived again by the next archive_completed)
+            archived = self.archive.identifiers(lst.identifier)
+            if archived:
+                archived &= {item.identifier for item in new_list.items}
+                self.restore_archived(lst.identifier, archived, keep=False)
+            with lock.write_locked():
+                self._merge_list(lst, new_list, prune, summary)
+        return summary
+
+    def _merge_list(self, lst: TODOList, new_list: TODOList, prune: bool, summary: MergeSummary):
+        if (lst.title, lst.description) != (new_list.title, new_list.description):
+            lst.title = new_list.title
+            lst.description = new_list.description
+            summary.lists_updated += 1
+        current = {item.identifier: item for item in lst.items}
+        for new_item in new_list.items:
+            item = current.get(new_item.identifier)
+            if item is new_item:
+                summary.items_unchanged += 1
+            elif item is None:
+                lst.add_item(new_item)
+                self.scheduler.schedule(lst.identifier, new_item)
+                summary.items_added += 1
             else:
-                self.todo_lists = JSONSerializer().import_data(filepath)
+                if item.content_hash() != new_item.content_hash():
+                    for name in ITEM_CONTENT_FIELDS:
+                        setattr(item, name, getattr(new_item, name))
+                    self.scheduler.schedule(lst.identifier, item)
+                    summary.items_updated += 1
+                else:
+                    summary.items_unchanged += 1
+                # The next import of the same record can skip it
+                item.__dict__["_record_hash"] = new_item.record_hash
+        incoming_ids = {item.identifier for item in new_list.items} if prune else set()
+        if prune and len(lst.items) > len(incoming_ids):
+            for item in lst.items:
+                if item.identifier not in incoming_ids:
+                    # The item may have moved to another list that scheduled it
+                    self.scheduler.cancel(item.identifier, lst.identifier)
+            summary.items_removed += lst.retain_items(incoming_ids)
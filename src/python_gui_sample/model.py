@@ -1,11 +1,26 @@
+import collections
+import contextlib
+import copy
 import dataclasses
 import datetime
+import heapq
 import uuid
 
 # Alternatively, a more complex model library could be used, such as Pydantic or Marshmallow,
 # but for simplicity, we will use dataclasses here.
 
-@dataclasses.dataclass
+# Fields of TODOItem that affect ListStats; changing them updates the statistics
+STATS_FIELDS = frozenset({"completed_at", "due_at", "priority"})
+
+
+def local_naive(value: datetime.datetime) -> datetime.datetime:
+    """Convert an aware datetime to naive local time so it compares with GUI input."""
+    if value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+@dataclasses.dataclass(init=False)
 class TODOItem:
     """
     A class to represent a single item in a TO-DO list.
@@ -19,6 +34,53 @@ class TODOItem:
     tags: set[str] = dataclasses.field(default_factory=set)
     identifier: uuid.UUID = dataclasses.field(default_factory=uuid.uuid4)
 
+    def __init__(self, title: str = "", description: str = "",
+                 created_at: datetime.datetime | None = None,
+                 completed_at: datetime.datetime | None = None,
+                 due_at: datetime.datetime | None = None, priority: int = 0,
+                 tags: set[str] | None = None, identifier: uuid.UUID | None = None):
+        # pylint: disable=too-many-positional-arguments
+        # Written out instead of generated: the generated __init__ assigns every
+        # field through __setattr__, which made creating items (e.g. on import)
+        # about three times slower. A new item has no list, so no statistics to update.
+        # Storing into the dict one by one is faster than update() with keywords.
+        fields = self.__dict__
+        fields["title"] = title
+        fields["description"] = description
+        fields["created_at"] = datetime.datetime.now() if created_at is None else created_at
+        fields["completed_at"] = completed_at
+        fields["due_at"] = due_at
+        fields["priority"] = priority
+        fields["tags"] = set() if tags is None else tags
+        fields["identifier"] = uuid.uuid4() if identifier is None else identifier
+
+    def __setattr__(self, name, value):
+        # Keep the statistics of the owning list up to date (see ListStats). Any
+        # change makes the item differ from the record it was imported from.
+        self.__dict__.pop("_record_hash", None)
+        stats = self.__dict__.get("_stats") if name in STATS_FIELDS else None
+        if stats is None:
+            object.__setattr__(self, name, value)
+            return
+        stats.discard(self)
+        object.__setattr__(self, name, value)
+        stats.include(self)
+
+    def __copy__(self):
+        # A copy belongs to no list, changing it must not touch the statistics
+        # of the original's list
+        copied = type(self).__new__(type(self))
+        copied.__dict__.update(self.__dict__)
+        copied.__dict__.pop("_stats", None)
+        return copied
+
+    def __deepcopy__(self, memo):
+        copied = type(self).__new__(type(self))
+        memo[id(self)] = copied
+        state = {key: value for key, value in self.__dict__.items() if key != "_stats"}
+        copied.__dict__.update(copy.deepcopy(state, memo))
+        return copied
+
     def mark_completed(self):
         """Mark the item as completed."""
         self.completed_at = datetime.datetime.now()
@@ -32,6 +94,16 @@ class TODOItem:
         """Check if the item is completed."""
         return self.completed_at is not None
 
+    @property
+    def record_hash(self) -> int | None:
+        """Hash of the raw record the item was imported from, None once the item changed."""
+        return self.__dict__.get("_record_hash")
+
+    def content_hash(self) -> int:
+        """Hash of all fields except the identifier, used to detect changed items."""
+        return hash((self.title, self.description, self.created_at, self.completed_at,
+                     self.due_at, self.priority, frozenset(self.tags)))
+
     def __eq__(self, other):
         """Check equality based on identifier."""
         if isinstance(other, TODOItem):
@@ -39,6 +111,156 @@ class TODOItem:
         return False
 
 
+@dataclasses.dataclass
+class ListStats:
+    """
+    Aggregate statistics of items, updated incrementally as items change.
+    """
+    open: int = 0
+    completed: int = 0
+    # Number of open items per priority
+    priorities: collections.Counter = dataclasses.field(default_factory=collections.Counter)
+    # Number of open items per due date
+    due_dates: collections.Counter = dataclasses.field(default_factory=collections.Counter)
+    parent: "ListStats | None" = dataclasses.field(default=None, repr=False, compare=False)
+    lock: contextlib.AbstractContextManager = dataclasses.field(
+        default_factory=contextlib.nullcontext, repr=False, compare=False
+    )
+    # Like DueScheduler: due dates from the last now passed to overdue() or
+    # next_due() on are kept in a min-heap, the items due before that are only
+    # counted. Dates no longer counted in due_dates leave the heap lazily.
+    _upcoming: list[datetime.datetime] = dataclasses.field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+    _now: datetime.datetime | None = dataclasses.field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _overdue: int = dataclasses.field(default=0, init=False, repr=False, compare=False)
+
+    # Rebuild the heap when it holds this many times more dates than are counted
+    COMPACT_RATIO = 4
+
+    def __post_init__(self):
+        self._upcoming = list(self.due_dates)
+        heapq.heapify(self._upcoming)
+
+    @classmethod
+    def from_items(cls, items: list[TODOItem]) -> "ListStats":
+        """Compute the statistics from scratch (e.g. to check the incremental ones)."""
+        # Counted from lists, which Counter does in C (imports create every list this way)
+        open_items = [item for item in items if item.completed_at is None]
+        due = [item.due_at for item in open_items if item.due_at is not None]
+        return cls(open=len(open_items), completed=len(items) - len(open_items),
+                   priorities=collections.Counter([item.priority for item in open_items]),
+                   due_dates=collections.Counter([due_at if due_at.tzinfo is None
+                                                  else local_naive(due_at) for due_at in due]))
+
+    def _count_due(self, due_at: datetime.datetime, count: int):
+        # Called with the lock held
+        previous = self.due_dates[due_at]
+        if previous + count:
+            self.due_dates[due_at] = previous + count
+        else:
+            del self.due_dates[due_at]
+        if self._now is not None and due_at < self._now:
+            self._overdue += count
+        elif not previous:
+            heapq.heappush(self._upcoming, due_at)
+            if len(self._upcoming) > self.COMPACT_RATIO * max(len(self.due_dates), 16):
+                self._upcoming = [d for d in self.due_dates if self._now is None or d >= self._now]
+                heapq.heapify(self._upcoming)
+
+    def _apply(self, item: TODOItem, sign: int):
+        if item.completed_at is not None:
+            self.completed += sign
+            return
+        self.open += sign
+        self.priorities[item.priority] += sign
+        if not self.priorities[item.priority]:
+            del self.priorities[item.priority]
+        if item.due_at is not None:
+            self._count_due(local_naive(item.due_at), sign)
+
+    def include(self, item: TODOItem):
+        """Count the item in."""
+        with self.lock:
+            self._apply(item, 1)
+        if self.parent is not None:
+            self.parent.include(item)
+
+    def discard(self, item: TODOItem):
+        """Count the item out."""
+        with self.lock:
+            self._apply(item, -1)
+        if self.parent is not None:
+            self.parent.discard(item)
+
+    def attach(self, parent: "ListStats"):
+        """Add these statistics to parent and keep propagating changes to it."""
+        with parent.lock:
+            parent.open += self.open
+            parent.completed += self.completed
+            parent.priorities.update(self.priorities)
+            for due_at, count in self.due_dates.items():
+                parent._count_due(due_at, count)  # pylint: disable=protected-access
+        self.parent = parent
+
+    def detach(self):
+        """Subtract these statistics from the parent and stop propagating changes."""
+        parent, self.parent = self.parent, None
+        if parent is None:
+            return
+        with parent.lock:
+            parent.open -= self.open
+            parent.completed -= self.completed
+            parent.priorities.subtract(self.priorities)
+            parent.priorities = +parent.priorities
+            for due_at, count in self.due_dates.items():
+                parent._count_due(due_at, -count)  # pylint: disable=protected-access
+
+    def copy(self) -> "ListStats":
+        """Copy of the counts, not attached to a parent."""
+        return ListStats(open=self.open, completed=self.completed,
+                         priorities=collections.Counter(self.priorities),
+                         due_dates=collections.Counter(self.due_dates))
+
+    @property
+    def total(self) -> int:
+        """Number of all items."""
+        return self.open + self.completed
+
+    def _advance(self, now: datetime.datetime):
+        # Called with the lock held: count the dates before now as overdue
+        if self._now is not None and now < self._now:
+            # An earlier now than last time, start over
+            self._overdue = sum(count for due_at, count in self.due_dates.items() if due_at < now)
+            self._upcoming = [due_at for due_at in self.due_dates if due_at >= now]
+            heapq.heapify(self._upcoming)
+        else:
+            passed = None
+            while self._upcoming and self._upcoming[0] < now:
+                due_at = heapq.heappop(self._upcoming)
+                # A date counted again after it left due_dates is in the heap twice
+                if due_at != passed:
+                    self._overdue += self.due_dates[due_at]
+                passed = due_at
+        self._now = now
+
+    def overdue(self, now: datetime.datetime | None = None) -> int:
+        """Number of open items that are past their due date."""
+        with self.lock:
+            self._advance(now or datetime.datetime.now())
+            return self._overdue
+
+    def next_due(self, now: datetime.datetime | None = None) -> datetime.datetime | None:
+        """The earliest due date of open items that is not yet overdue."""
+        with self.lock:
+            self._advance(now or datetime.datetime.now())
+            while self._upcoming and not self.due_dates[self._upcoming[0]]:
+                heapq.heappop(self._upcoming)
+            return self._upcoming[0] if self._upcoming else None
+
+
 @dataclasses.dataclass
 class TODOList:
     """
@@ -48,12 +270,63 @@ class TODOList:
     description: str = ""
     items: list[TODOItem] = dataclasses.field(default_factory=list)
     identifier: uuid.UUID = dataclasses.field(default_factory=uuid.uuid4)
+    stats: ListStats = dataclasses.field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.stats = ListStats.from_items(self.items)
+        # Items shared with another list (e.g. a snapshot copy) keep their owner
+        for item in self.items:
+            if item.__dict__.get("_stats") is None:
+                item.__dict__["_stats"] = self.stats
 
     def add_item(self, item: TODOItem):
         """Add an item to the list."""
+        owner = item.__dict__.get("_stats")
+        if owner is not None and owner is not self.stats:
+            owner.discard(item)
         self.items.append(item)
+        item.__dict__["_stats"] = self.stats
+        self.stats.include(item)
 
     def remove_item(self, item: TODOItem):
         """Remove an item from the list."""
-        if item in self.items:
+        try:
             self.items.remove(item)
+        except ValueError:
+            return
+        self._release(item)
+
+    def retain_items(self, identifiers: set[uuid.UUID]) -> int:
+        """Remove all items whose identifier is not given, return how many were removed."""
+        kept = []
+        for item in self.items:
+            if item.identifier in identifiers:
+                kept.append(item)
+            else:
+                self._release(item)
+        removed = len(self.items) - len(kept)
+        self.items[:] = kept
+        return removed
+
+    def _release(self, item: TODOItem):
+        if item.__dict__.get("_stats") is self.stats:
+            self.stats.discard(item)
+            del item.__dict__["_stats"]
+
+    def check_stats(self):
+        """Raise ValueError if the incremental statistics differ from a full recompute."""
+        expected = ListStats.from_items(self.items)
+        if self.stats != expected:
+            raise ValueError(f"Statistics of list '{self.title}' are inconsistent: "
+                             f"{self.stats} != {expected}")
+
+
+@dataclasses.dataclass
+class ListSummary:
+    """
+    The title, description and statistics of a list, without its items.
+    """
+    identifier: uuid.UUID
+    title: str
+    description: str
+    stats: ListStats
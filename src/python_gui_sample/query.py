@@ -0,0 +1,133 @@
+import ast
+import datetime
+import operator
+from collections.abc import Callable
+
+from .model import TODOList, TODOItem
+
+# This file contains a small query language to filter items, e.g. in the CLI:
+#
+#     priority <= 2 and 'work' in tags and not completed
+#     due_at < '2025-01-01' or list == 'Groceries'
+#
+# Expressions use Python syntax but only a safe subset is accepted: field names,
+# literals, comparisons (including "in"), "and", "or" and "not". The expression is
+# compiled once into nested closures, so evaluating it per item is cheap. Strings
+# compared with a date field are parsed as ISO dates; comparing a missing value
+# (None) by order is false instead of an error.
+
+Predicate = Callable[[TODOList, TODOItem], bool]
+
+FIELDS: dict[str, Callable[[TODOList, TODOItem], object]] = {
+    "title": lambda lst, item: item.title,
+    "description": lambda lst, item: item.description,
+    "created_at": lambda lst, item: item.created_at,
+    "completed_at": lambda lst, item: item.completed_at,
+    "due_at": lambda lst, item: item.due_at,
+    "priority": lambda lst, item: item.priority,
+    "tags": lambda lst, item: item.tags,
+    "identifier": lambda lst, item: str(item.identifier),
+    "completed": lambda lst, item: item.is_completed,
+    "list": lambda lst, item: lst.title,
+    "list_identifier": lambda lst, item: str(lst.identifier),
+}
+DATE_FIELDS = frozenset({"created_at", "completed_at", "due_at", "now"})
+
+OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+}
+ORDERING = (ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+
+class QueryError(ValueError):
+    pass
+
+
+def compile_query(expression: str) -> Predicate:
+    """Compile the expression into a predicate called with (list, item)."""
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError as e:
+        raise QueryError(f"Invalid query syntax: {e.msg}") from e
+    evaluate = _compile(tree.body)
+    return lambda lst, item: bool(evaluate(lst, item))
+
+
+def _compile(node: ast.AST):
+    if isinstance(node, ast.BoolOp):
+        parts = [_compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return lambda lst, item: all(part(lst, item) for part in parts)
+        return lambda lst, item: any(part(lst, item) for part in parts)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile(node.operand)
+        return lambda lst, item: not operand(lst, item)
+    if isinstance(node, ast.Compare):
+        return _compile_compare(node)
+    if isinstance(node, ast.Name):
+        if node.id == "now":
+            return lambda lst, item: datetime.datetime.now()
+        if node.id not in FIELDS:
+            raise QueryError(f"Unknown field: {node.id} (use one of {', '.join(FIELDS)})")
+        return FIELDS[node.id]
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        values = frozenset(_constant(element) for element in node.elts)
+        return lambda lst, item: values
+    value = _constant(node)
+    return lambda lst, item: value
+
+
+def _constant(node: ast.AST):
+    if isinstance(node, ast.Constant) and (node.value is None
+                                           or isinstance(node.value, (str, int, float))):
+        return node.value
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        return -_constant(node.operand)
+    raise QueryError(f"Unsupported expression: {ast.unparse(node)}")
+
+
+def _compile_compare(node: ast.Compare):
+    if any(type(op) not in OPERATORS for op in node.ops):
+        raise QueryError(f"Unsupported comparison: {ast.unparse(node)}")
+    operands = [node.left, *node.comparators]
+    compiled = []
+    for index, operand in enumerate(operands):
+        neighbours = operands[max(index - 1, 0):index + 2]
+        if isinstance(operand, ast.Constant) and isinstance(operand.value, str) and any(
+                isinstance(other, ast.Name) and other.id in DATE_FIELDS for other in neighbours):
+            # Parse strings compared with dates once, at compile time
+            compiled.append(_date_constant(operand.value))
+        else:
+            compiled.append(_compile(operand))
+    steps = [(OPERATORS[type(op)], isinstance(op, ORDERING)) for op in node.ops]
+
+    def compare(lst: TODOList, item: TODOItem) -> bool:
+        left = compiled[0](lst, item)
+        for (func, ordering), right_fn in zip(steps, compiled[1:]):
+            right = right_fn(lst, item)
+            if ordering and (left is None or right is None):
+                return False
+            try:
+                if not func(left, right):
+                    return False
+            except TypeError as e:
+                raise QueryError(f"Cannot compare {left!r} with {right!r}") from e
+            left = right
+        return True
+
+    return compare
+
+
+def _date_constant(text: str):
+    try:
+        value = datetime.datetime.fromisoformat(text)
+    except ValueError as e:
+        raise QueryError(f"Invalid date: {text}") from e
+    return lambda lst, item: value
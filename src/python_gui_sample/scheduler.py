@@ -0,0 +1,119 @@
+import datetime
+import heapq
+import itertools
+import threading
+import uuid
+
+from .model import TODOItem, local_naive
+
+# This file contains the scheduler that tells when items come due. Upcoming due
+# dates are kept in a min-heap, so finding the next one is O(1) and adding one is
+# O(log n). Changed, deleted or completed items are not removed from the heap
+# (that would be O(n)); they are only forgotten in a dictionary and their heap
+# entries are dropped when they reach the top (lazy deletion). The front-ends use
+# next_due() to sleep until the next due time instead of polling all items.
+
+# Titles listed by due_message(), an import of overdue items fires all of them
+MAX_DUE_TITLES = 10
+
+
+def due_message(due: list[tuple[uuid.UUID, TODOItem]], limit: int = MAX_DUE_TITLES) -> str:
+    """Tell which items came due, listing at most limit titles."""
+    titles = [item.title for _, item in due[:limit]]
+    if len(due) > limit:
+        titles.append(f"... and {len(due) - limit:,} more")
+    return "Items are due now:\n" + "\n".join(titles)
+
+
+class DueScheduler:
+    """
+    Min-heap of upcoming due dates with callbacks fired when items come due.
+    """
+
+    # Rebuild the heap when it holds this many times more entries than are live
+    COMPACT_RATIO = 4
+
+    def __init__(self):
+        self._heap: list[tuple[datetime.datetime, int, uuid.UUID]] = []
+        self._entries: dict[uuid.UUID, tuple[datetime.datetime, uuid.UUID, TODOItem]] = {}
+        self._counter = itertools.count()
+        self._callbacks: list = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback):
+        """Register callback(list_identifier, item) fired for every due item."""
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        """Unregister a callback registered by add_callback."""
+        self._callbacks.remove(callback)
+
+    def schedule(self, list_identifier: uuid.UUID, item: TODOItem):
+        """Schedule the item (or reschedule/cancel it after a change)."""
+        with self._lock:
+            if item.due_at is None or item.is_completed:
+                self._entries.pop(item.identifier, None)
+                return
+            due_at = local_naive(item.due_at)
+            current = self._entries.get(item.identifier)
+            self._entries[item.identifier] = (due_at, list_identifier, item)
+            if current is None or current[0] != due_at:
+                heapq.heappush(self._heap, (due_at, next(self._counter), item.identifier))
+                self._compact()
+
+    def cancel(self, item_identifier: uuid.UUID, list_identifier: uuid.UUID | None = None):
+        """Forget the item (if scheduled for the given list), its heap entry is dropped lazily."""
+        with self._lock:
+            current = self._entries.get(item_identifier)
+            if current is not None and list_identifier in (None, current[1]):
+                del self._entries[item_identifier]
+
+    def clear(self):
+        """Forget all items."""
+        with self._lock:
+            self._heap.clear()
+            self._entries.clear()
+
+    def _compact(self):
+        if len(self._heap) > self.COMPACT_RATIO * max(len(self._entries), 16):
+            self._heap = [(due_at, next(self._counter), key)
+                          for key, (due_at, _, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _is_live(self, entry: tuple[datetime.datetime, int, uuid.UUID]) -> bool:
+        current = self._entries.get(entry[2])
+        if current is None or current[0] != entry[0]:
+            return False
+        # The item may have been changed directly, bypassing the logic
+        item = current[2]
+        if item.is_completed or item.due_at is None or local_naive(item.due_at) != entry[0]:
+            del self._entries[entry[2]]
+            return False
+        return True
+
+    def next_due(self) -> datetime.datetime | None:
+        """Return the earliest upcoming due date, if any."""
+        with self._lock:
+            while self._heap and not self._is_live(self._heap[0]):
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime.datetime | None = None) -> list[tuple[uuid.UUID, TODOItem]]:
+        """Remove and return (list_identifier, item) of all items due until now."""
+        now = now or datetime.datetime.now()
+        result = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                entry = heapq.heappop(self._heap)
+                if self._is_live(entry):
+                    _, list_identifier, item = self._entries.pop(entry[2])
+                    result.append((list_identifier, item))
+        return result
+
+    def fire_due(self, now: datetime.datetime | None = None) -> list[tuple[uuid.UUID, TODOItem]]:
+        """Pop all due items and call the registered callbacks for each of them."""
+        due = self.pop_due(now)
+        for list_identifier, item in due:
+            for callback in list(self._callbacks):
+                callback(list_identifier, item)
+        return due
@@ -1,7 +1,24 @@
+import pathlib
+
+from .base import Record, SerializerStrategy
 from .csv_serializer import CSVSerializer
 from .json_serializer import JSONSerializer
+from .compression import open_text, strip_compression_suffix
+
+
+def serializer_for(filepath: pathlib.Path) -> SerializerStrategy:
+    """Pick the serializer by the suffix in front of an optional compression suffix."""
+    if strip_compression_suffix(pathlib.Path(filepath)).name.endswith(".csv"):
+        return CSVSerializer()
+    return JSONSerializer()
+
 
 __all__ = [
     "CSVSerializer",
     "JSONSerializer",
+    "Record",
+    "SerializerStrategy",
+    "open_text",
+    "serializer_for",
+    "strip_compression_suffix",
 ]
@@ -1,14 +1,36 @@
 import abc
 import pathlib
+import uuid
+from collections.abc import Iterable, Iterator
 
-from ..model import TODOList
+from ..model import TODOList, TODOItem
+
+# A record is one item together with the list it belongs to. The list is only a
+# header (title, description, identifier) without items; consecutive records of
+# the same list share the same header object. Lists without items are passed as
+# a record with None instead of an item.
+Record = tuple[TODOList, TODOItem | None]
 
 
 class SerializerStrategy(abc.ABC):
     @abc.abstractmethod
-    def export_data(self, data: list[TODOList], filepath: pathlib.Path) -> None:
+    def export_data(self, data: dict[uuid.UUID, TODOList], filepath: pathlib.Path) -> None:
         pass
 
     @abc.abstractmethod
-    def import_data(self, filepath: pathlib.Path) -> list[TODOList]:
-        pass
+    def import_data(self, filepath: pathlib.Path,
+                    known: dict[int, TODOItem] | None = None) -> dict[uuid.UUID, TODOList]:
+        """
+        Read all lists of the file.
+
+        known maps record hashes (see TODOItem.record_hash) to items; records with
+        such a hash are not decoded, the lists get the known item instead.
+        """
+
+    @abc.abstractmethod
+    def iter_records(self, filepath: pathlib.Path) -> Iterator[Record]:
+        """Read the file record by record without loading it whole."""
+
+    @abc.abstractmethod
+    def write_records(self, records: Iterable[Record], filepath: pathlib.Path) -> None:
+        """Write records to the file as they come (records of a list should be consecutive)."""
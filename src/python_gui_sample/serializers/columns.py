@@ -0,0 +1,151 @@
+import contextlib
+import dataclasses
+import datetime
+import gc
+import itertools
+import sys
+import uuid
+from collections.abc import Callable, Iterable, Sequence
+
+from ..model import TODOItem
+
+# This file contains the batched decoding used by the importers. Instead of
+# parsing each field of each row separately, the importers collect whole
+# columns and decode them here in one go:
+#
+# - UUID columns are joined, checked and converted by one bytes.fromhex() call
+#   and the UUIDs are built from integers, skipping the string parsing,
+# - due and completion dates are decoded once per distinct value (they repeat
+#   a lot) and the datetime objects are shared; creation times are nearly all
+#   distinct and are parsed one by one,
+# - tags are split once per distinct value and tag names are interned,
+# - the cyclic garbage collector is paused meanwhile (see paused_gc()),
+# - every record is hashed as read, and a merging import passes the items whose
+#   record hash it knows: such records are unchanged and not decoded again.
+#
+# A column that does not take the fast path (e.g. UUIDs in braces or URNs) is
+# decoded value by value with the regular constructors, so accepted formats and
+# errors stay the same.
+
+ITEM_FIELDS = tuple(field.name for field in dataclasses.fields(TODOItem))
+
+# Positions of the separators in "xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx\n"
+_UUID_SEPARATORS = ((8, "-"), (13, "-"), (18, "-"), (23, "-"), (36, "\n"))
+
+
+@contextlib.contextmanager
+def paused_gc():
+    """
+    Pause the cyclic garbage collector while creating many objects that are kept.
+
+    The collector is paused for the whole process, not only the calling thread:
+    e.g. in the TODO service, ops running in other executor threads meanwhile
+    leave their reference cycles uncollected until the import is done.
+    """
+    # Otherwise every few hundred new objects trigger a collection that scans
+    # the growing number of objects created so far (none of them garbage)
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def decode_distinct(column: Sequence, decode: Callable[[list], list]) -> list:
+    """Decode every distinct value of the column once and share the results."""
+    values = dict.fromkeys(column)
+    values.update(zip(values, decode(list(values))))
+    return [values[value] for value in column]
+
+
+def _uuid_column_bytes(column: Sequence[str]) -> bytes | None:
+    # Every value takes 37 characters of the joined column, so the separators
+    # can be checked for all values at once by slicing with a step
+    joined = "\n".join(column) + "\n"
+    if len(joined) != 37 * len(column):
+        return None
+    if any(set(joined[position::37]) - {separator} for position, separator in _UUID_SEPARATORS):
+        return None
+    try:
+        raw = bytes.fromhex(joined.replace("-", "").replace("\n", ""))
+    except ValueError:
+        return None
+    # Whitespace inside a value is skipped by fromhex, leaving fewer bytes
+    return raw if len(raw) == 16 * len(column) else None
+
+
+def decode_uuids(column: Sequence[str]) -> list[uuid.UUID]:
+    """Decode a column of UUID strings."""
+    raw = _uuid_column_bytes(column)
+    if raw is None:
+        return [uuid.UUID(value) for value in column]
+    from_bytes = int.from_bytes
+    return [uuid.UUID(int=from_bytes(raw[start:start + 16], "big"))
+            for start in range(0, len(raw), 16)]
+
+
+def _parse_optional_datetimes(values: list[str | None]) -> list[datetime.datetime | None]:
+    parse = datetime.datetime.fromisoformat
+    return [parse(value) if value else None for value in values]
+
+
+def parse_datetimes(column: Iterable[str]) -> list[datetime.datetime]:
+    """Decode a column of mostly distinct ISO timestamps (e.g. creation times)."""
+    return list(map(datetime.datetime.fromisoformat, column))
+
+
+def decode_datetimes(column: Sequence[str | None]) -> list[datetime.datetime | None]:
+    """Decode a column of repeating ISO timestamps (empty strings and None are None)."""
+    return decode_distinct(column, _parse_optional_datetimes)
+
+
+def decode_tags(column: Sequence, separator: str | None = None) -> list[set[str]]:
+    """Decode a column of tag lists (or of strings joined by the separator) into sets."""
+    intern = sys.intern
+    distinct: dict = {}
+    result = []
+    for value in column:
+        # Lists cannot be dictionary keys
+        key = value if separator is not None else tuple(value)
+        tags = distinct.get(key)
+        if tags is None:
+            if separator is not None:
+                value = value.split(separator) if value else ()
+            tags = distinct[key] = frozenset(map(intern, value))
+        # Every item gets its own set, the tags of an item can be changed
+        result.append(set(tags))
+    return result
+
+
+def build_items(*columns: Sequence) -> list[TODOItem]:
+    """Create items from decoded columns given in the order of ITEM_FIELDS."""
+    return list(itertools.starmap(TODOItem, zip(*columns, strict=True)))
+
+
+def record_hashes(*columns: Iterable) -> list[int]:
+    """Hash the raw values of every record (all values must be hashable)."""
+    return list(map(hash, zip(*columns)))
+
+
+def build_records(hashes: list[int], known: dict[int, TODOItem] | None,
+                  columns: Sequence[Sequence], build: Callable[..., list[TODOItem]]
+                  ) -> list[TODOItem]:
+    """
+    Create the items of raw records, reusing the known item of a record with a known hash.
+
+    build(*columns) decodes the raw columns of the remaining records; the items it
+    creates keep the hash of their record (see TODOItem.record_hash).
+    """
+    known = known or {}
+    items: list = [known.get(record_hash) for record_hash in hashes]
+    missing = [index for index, item in enumerate(items) if item is None]
+    if not missing:
+        return items
+    if len(missing) < len(hashes):
+        columns = [[column[index] for index in missing] for column in columns]
+    for index, item in zip(missing, build(*columns), strict=True):
+        item.__dict__["_record_hash"] = hashes[index]
+        items[index] = item
+    return items
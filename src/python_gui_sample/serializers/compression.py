@@ -0,0 +1,199 @@
+import bz2
+import io
+import lzma
+import pathlib
+import queue
+import threading
+import zlib
+from collections.abc import Callable
+from typing import Any
+
+# This file contains transparent compression for serializer streams. Compressed
+# files are recognised by suffix when writing (e.g. "todos.csv.gz") and by magic
+# bytes when reading, so a renamed file still imports. The (de)compression itself
+# runs in a background thread connected to the caller by a bounded queue of
+# chunks: while the serializer formats or parses text, the other thread
+# compresses or decompresses the previous chunk and does the file I/O.
+
+CHUNK_SIZE = 256 * 1024
+QUEUE_DEPTH = 8
+
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+GZIP_LEVEL = 6
+
+COMPRESSORS: dict[str, Callable[[], Any]] = {
+    ".gz": lambda: zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS),
+    ".bz2": bz2.BZ2Compressor,
+    ".xz": lzma.LZMACompressor,
+}
+
+DECOMPRESSORS: dict[str, Callable[[], Any]] = {
+    ".gz": lambda: zlib.decompressobj(GZIP_WBITS),
+    ".bz2": bz2.BZ2Decompressor,
+    ".xz": lzma.LZMADecompressor,
+}
+
+MAGIC_BYTES = {
+    b"\x1f\x8b": ".gz",
+    b"BZh": ".bz2",
+    b"\xfd7zXZ\x00": ".xz",
+}
+
+
+def compression_suffix(filepath: pathlib.Path) -> str | None:
+    """Return the compression suffix of the file name, if it has one."""
+    suffix = filepath.suffix.lower()
+    return suffix if suffix in COMPRESSORS else None
+
+
+def strip_compression_suffix(filepath: pathlib.Path) -> pathlib.Path:
+    """Return the path without its compression suffix (used to pick the format)."""
+    return filepath.with_suffix("") if compression_suffix(filepath) else filepath
+
+
+def detect_compression(filepath: pathlib.Path) -> str | None:
+    """Detect the compression of an existing file from its magic bytes."""
+    with open(filepath, "rb") as f:
+        head = f.read(max(len(magic) for magic in MAGIC_BYTES))
+    for magic, suffix in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return suffix
+    return None
+
+
+class _PipelinedWriter(io.RawIOBase):
+
+    def __init__(self, filepath: pathlib.Path, compressor):
+        super().__init__()
+        self._file = open(filepath, "wb")  # pylint: disable=consider-using-with
+        self._compressor = compressor
+        self._chunks: queue.Queue[bytes | None] = queue.Queue(QUEUE_DEPTH)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while (chunk := self._chunks.get()) is not None:
+                self._file.write(self._compressor.compress(chunk))
+            self._file.write(self._compressor.flush())
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            self._error = e
+            # Keep draining so the producer is never blocked on a full queue
+            while self._chunks.get() is not None:
+                pass
+        finally:
+            self._file.close()
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        if self._error is not None:
+            raise self._error
+        self._chunks.put(bytes(b))
+        return len(b)
+
+    def close(self):
+        if not self.closed:
+            self._chunks.put(None)
+            self._thread.join()
+            super().close()
+            if self._error is not None:
+                raise self._error
+
+
+class _PipelinedReader(io.RawIOBase):
+
+    def __init__(self, filepath: pathlib.Path, decompressor_factory):
+        super().__init__()
+        self._file = open(filepath, "rb")  # pylint: disable=consider-using-with
+        self._decompressor_factory = decompressor_factory
+        self._chunks: queue.Queue[bytes | BaseException | None] = queue.Queue(QUEUE_DEPTH)
+        self._buffer = b""
+        self._eof = False
+        self._error: BaseException | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            decompressor = self._decompressor_factory()
+            while not self._stop.is_set():
+                data = self._file.read(CHUNK_SIZE)
+                if not data:
+                    break
+                while data:
+                    # Concatenated streams (e.g. multi-member gzip) need a fresh decompressor
+                    if decompressor.eof:
+                        decompressor = self._decompressor_factory()
+                    chunk = decompressor.decompress(data)
+                    data = decompressor.unused_data if decompressor.eof else b""
+                    if chunk:
+                        self._chunks.put(chunk)
+            if not self._stop.is_set() and not decompressor.eof:
+                raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+            self._chunks.put(None)
+        except BaseException as e:  # pylint: disable=broad-exception-caught
+            self._chunks.put(e)
+        finally:
+            self._file.close()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._error is not None:
+            raise self._error
+        while not self._buffer and not self._eof:
+            chunk = self._chunks.get()
+            if chunk is None:
+                self._eof = True
+            elif isinstance(chunk, BaseException):
+                # Keep failing, a caller retrying must not see a clean end of file
+                self._eof = True
+                self._error = chunk
+                raise chunk
+            else:
+                self._buffer = chunk
+        size = min(len(b), len(self._buffer))
+        b[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            # Unblock the worker if it waits on a full queue
+            while self._thread.is_alive():
+                try:
+                    self._chunks.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            super().close()
+
+
+def open_text(filepath: pathlib.Path, mode: str = "r", newline: str | None = None) -> io.TextIOBase:
+    """
+    Open a serializer file in text mode, compressing or decompressing on the fly.
+
+    When writing, compression is chosen by the file suffix; when reading, by the
+    magic bytes of the file. Uncompressed files are opened directly.
+    """
+    filepath = pathlib.Path(filepath)
+    if mode == "w":
+        suffix = compression_suffix(filepath)
+        if suffix is None:
+            return open(filepath, "w", newline=newline, encoding="utf-8")
+        raw: io.RawIOBase = _PipelinedWriter(filepath, COMPRESSORS[suffix]())
+        return io.TextIOWrapper(io.BufferedWriter(raw, CHUNK_SIZE), encoding="utf-8",
+                                newline=newline)
+    if mode == "r":
+        suffix = detect_compression(filepath)
+        if suffix is None:
+            return open(filepath, "r", newline=newline, encoding="utf-8")
+        raw = _PipelinedReader(filepath, DECOMPRESSORS[suffix])
+        return io.TextIOWrapper(io.BufferedReader(raw, CHUNK_SIZE), encoding="utf-8",
+                                newline=newline)
+    raise ValueError(f"Unsupported mode: {mode}")
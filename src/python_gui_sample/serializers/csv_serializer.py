@@ -1,54 +1,126 @@
 import csv
-import datetime
+import itertools
 import pathlib
 import uuid
+from collections.abc import Iterable, Iterator
 
-from .base import SerializerStrategy
+from .base import Record, SerializerStrategy
+from .columns import (build_items, build_records, decode_datetimes, decode_tags, decode_uuids,
+                      parse_datetimes, paused_gc, record_hashes)
+from .compression import open_text
 from ..model import TODOList, TODOItem
 
+HEADER = [
+    "list_uuid", "list_title", "list_description",
+    "item_uuid", "title", "description", "created_at",
+    "completed_at", "due_at", "priority", "tags"
+]
+# Columns of the item fields, in the order of the TODOItem fields
+ITEM_COLUMNS = [
+    "title", "description", "created_at", "completed_at", "due_at", "priority", "tags",
+    "item_uuid"
+]
+# Number of rows decoded together when streaming records
+BATCH_SIZE = 4096
+
+
+def _item_row(tdl: TODOList, item: TODOItem) -> list:
+    return [
+        str(tdl.identifier), tdl.title, tdl.description,
+        str(item.identifier), item.title, item.description,
+        item.created_at.isoformat(),
+        item.completed_at.isoformat() if item.completed_at else "",
+        item.due_at.isoformat() if item.due_at else "",
+        item.priority, ";".join(item.tags)
+    ]
+
+
+def _build_items(titles, descriptions, created_at, completed_at, due_at, priorities, tags,
+                 identifiers) -> list[TODOItem]:
+    # pylint: disable=too-many-positional-arguments
+    return build_items(
+        titles,
+        descriptions,
+        parse_datetimes(created_at),
+        decode_datetimes(completed_at),
+        decode_datetimes(due_at),
+        list(map(int, priorities)),
+        decode_tags(tags, ";"),
+        decode_uuids(identifiers),
+    )
+
+
+def _decode_rows(header: list[str], rows: list[list], lists: dict[uuid.UUID, TODOList],
+                 spellings: dict[str, TODOList],
+                 known: dict[int, TODOItem] | None = None) -> list[tuple[TODOList, TODOItem]]:
+    # Decode the rows column by column; lists seen for the first time are added
+    # to lists, and every way their UUID is written to spellings. Rows hashing to
+    # a key of known are not decoded, they get the known item.
+    width = len(header)
+    # Like csv.DictReader: skip empty rows and treat missing trailing values as None
+    rows = [row if len(row) >= width else row + [None] * (width - len(row)) for row in rows if row]
+    if not rows:
+        return []
+    columns = dict(zip(header, zip(*rows)))
+    item_columns = [columns[name] for name in ITEM_COLUMNS]
+    items = build_records(record_hashes(columns["list_uuid"], *item_columns), known,
+                          item_columns, _build_items)
+    # Lists are looked up by the UUID string, hashing uuid.UUID is done in Python.
+    # A string seen for the first time is parsed, so that e.g. upper and lower
+    # case spellings of one UUID end up in the same list.
+    list_uuids = columns["list_uuid"]
+    for list_uuid, title, description in zip(list_uuids, columns["list_title"],
+                                             columns["list_description"]):
+        if list_uuid not in spellings:
+            identifier = uuid.UUID(list_uuid)
+            if identifier not in lists:
+                lists[identifier] = TODOList(title=title, description=description,
+                                             identifier=identifier)
+            spellings[list_uuid] = lists[identifier]
+    return list(zip(map(spellings.__getitem__, list_uuids), items))
+
 
 class CSVSerializer(SerializerStrategy):
     def export_data(self, data: dict[uuid.UUID, TODOList], filepath: pathlib.Path) -> None:
-        with open(filepath, 'w', newline='') as csvfile:
+        with open_text(filepath, "w", newline="") as csvfile:
             writer = csv.writer(csvfile)
-            writer.writerow([
-                "list_uuid", "list_title", "list_description",
-                "item_uuid", "title", "description", "created_at",
-                "completed_at", "due_at", "priority", "tags"
-            ])
+            writer.writerow(HEADER)
             for list_uuid, tdl in data.items():
                 for item in tdl.items:
-                    writer.writerow([
-                        str(tdl.identifier), tdl.title, tdl.description,
-                        str(item.identifier), item.title, item.description,
-                        item.created_at.isoformat(),
-                        item.completed_at.isoformat() if item.completed_at else "",
-                        item.due_at.isoformat() if item.due_at else "",
-                        item.priority, ";".join(item.tags)
-                    ])
-
-    def import_data(self, filepath: pathlib.Path) -> dict[uuid.UUID, TODOList]:
-        result: dict[uuid.UUID, TODOList] = {}
-        with open(filepath, newline='') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                list_uuid = uuid.UUID(row["list_uuid"])
-                if list_uuid not in result:
-                    result[list_uuid] = TODOList(
-                        title=row["list_title"],
-                        description=row["list_description"],
-                        identifier=list_uuid,
-                        items=[]
-                    )
-                item = TODOItem(
-                    title=row["title"],
-                    description=row["description"],
-                    created_at=datetime.datetime.fromisoformat(row["created_at"]),
-                    completed_at=datetime.datetime.fromisoformat(row["completed_at"]) if row["completed_at"] else None,
-                    due_at=datetime.datetime.fromisoformat(row["due_at"]) if row["due_at"] else None,
-                    priority=int(row["priority"]),
-                    tags=set(row["tags"].split(";")) if row["tags"] else set(),
-                    identifier=uuid.UUID(row["item_uuid"])
-                )
-                result[list_uuid].items.append(item)
-        return result
+                    writer.writerow(_item_row(tdl, item))
+
+    def import_data(self, filepath: pathlib.Path,
+                    known: dict[int, TODOItem] | None = None) -> dict[uuid.UUID, TODOList]:
+        with paused_gc():
+            with open_text(filepath, "r", newline="") as csvfile:
+                reader = csv.reader(csvfile)
+                header = next(reader, [])
+                headers: dict[uuid.UUID, TODOList] = {}
+                records = _decode_rows(header, list(reader), headers, {}, known)
+            grouped: dict[int, list[TODOItem]] = {id(tdl): [] for tdl in headers.values()}
+            for tdl, item in records:
+                grouped[id(tdl)].append(item)
+            # The lists are created with all their items, computing the statistics once
+            result: dict[uuid.UUID, TODOList] = {}
+            for tdl in headers.values():
+                result[tdl.identifier] = TODOList(title=tdl.title, description=tdl.description,
+                                                  items=grouped[id(tdl)], identifier=tdl.identifier)
+            return result
+
+    def iter_records(self, filepath: pathlib.Path) -> Iterator[Record]:
+        headers: dict[uuid.UUID, TODOList] = {}
+        spellings: dict[str, TODOList] = {}
+        with open_text(filepath, "r", newline="") as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            while batch := list(itertools.islice(reader, BATCH_SIZE)):
+                yield from _decode_rows(header, batch, headers, spellings)
+
+    def write_records(self, records: Iterable[Record], filepath: pathlib.Path) -> None:
+        # CSV has no rows for lists without items, so such lists are skipped
+        with open_text(filepath, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(HEADER)
+            for tdl, item in records:
+                if item is not None:
+                    writer.writerow(_item_row(tdl, item))
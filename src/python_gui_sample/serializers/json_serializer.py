@@ -1,50 +1,318 @@
 import datetime
 import json
+import operator
 import pathlib
+import re
+import textwrap
 import uuid
+from collections.abc import Iterable, Iterator
 
-from .base import SerializerStrategy
+from .base import Record, SerializerStrategy
+from .columns import (ITEM_FIELDS, build_items, build_records, decode_datetimes, decode_tags,
+                      decode_uuids, parse_datetimes, paused_gc, record_hashes)
+from .compression import open_text
 from ..model import TODOList, TODOItem
 
 
+def _parse_datetime(value: str | None) -> datetime.datetime | None:
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+# Values of an item dictionary in the order of the TODOItem fields
+_item_values = operator.itemgetter(*ITEM_FIELDS)
+
+
+def item_to_dict(item: TODOItem) -> dict:
+    """Convert an item to a JSON-compatible dictionary."""
+    return {
+        'title': item.title,
+        'description': item.description,
+        'created_at': item.created_at.isoformat(),
+        'completed_at': item.completed_at.isoformat() if item.completed_at else None,
+        'due_at': item.due_at.isoformat() if item.due_at else None,
+        'priority': item.priority,
+        'tags': list(item.tags),
+        'identifier': str(item.identifier),
+    }
+
+
+def item_from_dict(raw: dict) -> TODOItem:
+    """Create an item from a dictionary produced by item_to_dict."""
+    return TODOItem(
+        title=raw['title'],
+        description=raw['description'],
+        created_at=datetime.datetime.fromisoformat(raw['created_at']),
+        completed_at=_parse_datetime(raw['completed_at']),
+        due_at=_parse_datetime(raw['due_at']),
+        priority=raw['priority'],
+        tags=set(raw['tags']),
+        identifier=uuid.UUID(raw['identifier'])
+    )
+
+
+def _build_items(titles, descriptions, created_at, completed_at, due_at, priorities, tags,
+                 identifiers) -> list[TODOItem]:
+    # pylint: disable=too-many-positional-arguments
+    return build_items(
+        titles,
+        descriptions,
+        parse_datetimes(created_at),
+        decode_datetimes(completed_at),
+        decode_datetimes(due_at),
+        priorities,
+        decode_tags(tags),
+        decode_uuids(identifiers),
+    )
+
+
+def items_from_dicts(raws: list[dict]) -> list[TODOItem]:
+    """Create items from dictionaries produced by item_to_dict, decoding them column by column."""
+    if not raws:
+        return []
+    return _build_items(*zip(*map(_item_values, raws)))
+
+
+def _items_from_lists(raw: list[dict], known: dict[int, TODOItem] | None) -> list[TODOItem]:
+    # The items of all lists, records hashing to a key of known get the known item
+    raws = [item for lst in raw for item in lst['items']]
+    if not raws:
+        return []
+    columns = list(zip(*map(_item_values, raws)))
+    (titles, descriptions, created_at, completed_at, due_at,
+     priorities, tags, identifiers) = columns
+    list_identifiers = [lst['identifier'] for lst in raw for _ in lst['items']]
+    # Lists cannot be hashed
+    hashes = record_hashes(list_identifiers, titles, descriptions, created_at, completed_at,
+                           due_at, priorities, map(tuple, tags), identifiers)
+    return build_records(hashes, known, columns, _build_items)
+
+
+def list_to_dict(tdl: TODOList) -> dict:
+    """Convert a list (including its items) to a JSON-compatible dictionary."""
+    # The identifier goes first so that a streaming reader knows the list
+    # before its items arrive
+    return {
+        'identifier': str(tdl.identifier),
+        'title': tdl.title,
+        'description': tdl.description,
+        'items': [item_to_dict(item) for item in tdl.items],
+    }
+
+
+def list_from_dict(raw: dict) -> TODOList:
+    """Create a list (including its items) from a dictionary produced by list_to_dict."""
+    return TODOList(
+        title=raw['title'],
+        description=raw['description'],
+        identifier=uuid.UUID(raw['identifier']),
+        items=items_from_dicts(raw['items'])
+    )
+
+
+class _StreamReader:
+    """
+    Incremental reader of the exported JSON layout (an array of list objects).
+
+    Only one item is decoded at a time, so memory does not grow with the file.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    NON_WHITESPACE = re.compile(r'\S')
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            found = self.NON_WHITESPACE.search(self.buffer, self.pos)
+            self.pos = found.start() if found else len(self.buffer)
+            if found or not self._fill():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Invalid JSON: expected '{char}' but got '{self.peek()}'")
+        self.pos += 1
+
+    def separator(self, closing: str) -> bool:
+        # Consume ',' and return True, or consume the closing bracket and return False
+        char = self.peek()
+        self.pos += 1
+        if char == ',':
+            return True
+        if char == closing:
+            return False
+        raise ValueError(f"Invalid JSON: expected ',' or '{closing}' but got '{char}'")
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the very end of the buffer might continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def array(self) -> Iterator:
+        # Decode the values of an array one by one
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if not self.separator(']'):
+                return
+
+    def records(self) -> Iterator[Record]:
+        self.expect('[')
+        if self.peek() == ']':
+            return
+        while True:
+            yield from self._list_records()
+            if not self.separator(']'):
+                return
+
+    def _list_records(self) -> Iterator[Record]:
+        self.expect('{')
+        fields: dict = {}
+        tdl = None
+        pending: list[TODOItem] = []
+        has_items = False
+        while self.peek() != '}':
+            key = self.value()
+            self.expect(':')
+            if key != 'items':
+                fields[key] = self.value()
+            else:
+                for raw in self.array():
+                    item = item_from_dict(raw)
+                    has_items = True
+                    if tdl is None and 'identifier' in fields:
+                        tdl = _list_header(fields)
+                    if tdl is None:
+                        # The list identifier comes after the items, keep them
+                        pending.append(item)
+                    else:
+                        yield tdl, item
+            if not self.separator('}'):
+                break
+        else:
+            self.pos += 1
+        tdl = tdl or _list_header(fields)
+        for item in pending:
+            yield tdl, item
+        if not has_items:
+            yield tdl, None
+
+
+def _list_header(fields: dict) -> TODOList:
+    return TODOList(
+        title=fields.get('title', ''),
+        description=fields.get('description', ''),
+        identifier=uuid.UUID(fields['identifier'])
+    )
+
+
+def _indented_item(item: TODOItem) -> str:
+    # Same text as json.dumps(item_to_dict(item), indent=2) nested in the export,
+    # written out by hand because json with indent falls back to a slow encoder
+    dumps = json.dumps
+    tags = '[]'
+    if item.tags:
+        tags = ',\n          '.join(dumps(tag) for tag in item.tags)
+        tags = f'[\n          {tags}\n        ]'
+    completed_at = item.completed_at.isoformat() if item.completed_at else None
+    due_at = item.due_at.isoformat() if item.due_at else None
+    return (
+        '      {\n'
+        f'        "title": {dumps(item.title)},\n'
+        f'        "description": {dumps(item.description)},\n'
+        f'        "created_at": "{item.created_at.isoformat()}",\n'
+        f'        "completed_at": {dumps(completed_at)},\n'
+        f'        "due_at": {dumps(due_at)},\n'
+        f'        "priority": {dumps(item.priority)},\n'
+        f'        "tags": {tags},\n'
+        f'        "identifier": "{item.identifier}"\n'
+        '      }'
+    )
+
+
 class JSONSerializer(SerializerStrategy):
     def export_data(self, data: dict[uuid.UUID, TODOList], filepath: pathlib.Path) -> None:
-        def default(o):
-            if isinstance(o, uuid.UUID):
-                return str(o)
-            if isinstance(o, set):
-                return list(o)
-            if isinstance(o, datetime.datetime):
-                return o.isoformat()
-            if hasattr(o, '__dict__'):
-                return o.__dict__
-            return str(o)
-
-        with open(filepath, 'w') as f:
-            json.dump(list(data.values()), f, default=default, indent=2)
-
-    def import_data(self, filepath: pathlib.Path) -> dict[uuid.UUID, TODOList]:
-        with open(filepath, 'r') as f:
-            raw = json.load(f)
-            result = {}
+        self.write_records(((tdl, item) for tdl in data.values() for item in tdl.items or (None,)),
+                           filepath)
+
+    def import_data(self, filepath: pathlib.Path,
+                    known: dict[int, TODOItem] | None = None) -> dict[uuid.UUID, TODOList]:
+        with paused_gc():
+            with open_text(filepath, 'r') as f:
+                raw = json.load(f)
+            # Decode the items of all lists together to share repeated values
+            items = _items_from_lists(raw, known)
+            result: dict[uuid.UUID, TODOList] = {}
+            start = 0
             for lst in raw:
-                items = [
-                    TODOItem(
-                        title=i['title'],
-                        description=i['description'],
-                        created_at=datetime.datetime.fromisoformat(i['created_at']),
-                        completed_at=datetime.datetime.fromisoformat(i['completed_at']) if i['completed_at'] else None,
-                        due_at=datetime.datetime.fromisoformat(i['due_at']) if i['due_at'] else None,
-                        priority=i['priority'],
-                        tags=set(i['tags']),
-                        identifier=uuid.UUID(i['identifier'])
-                    ) for i in lst['items']
-                ]
+                end = start + len(lst['items'])
                 tdl = TODOList(
                     title=lst['title'],
                     description=lst['description'],
                     identifier=uuid.UUID(lst['identifier']),
-                    items=items
+                    items=items[start:end]
                 )
-                result[tdl.identifier] = tdl
+                start = end
+                if tdl.identifier in result:
+                    # The same list split into several parts (e.g. by write_records)
+                    for item in tdl.items:
+                        result[tdl.identifier].add_item(item)
+                else:
+                    result[tdl.identifier] = tdl
             return result
+
+    def iter_records(self, filepath: pathlib.Path) -> Iterator[Record]:
+        with open_text(filepath, 'r') as f:
+            yield from _StreamReader(f).records()
+
+    def write_records(self, records: Iterable[Record], filepath: pathlib.Path) -> None:
+        # The output has the same layout as json.dump(..., indent=2) of all lists
+        with open_text(filepath, 'w') as f:
+            current = None
+            first_item = True
+            f.write('[')
+            for tdl, item in records:
+                if tdl is not current:
+                    if current is not None:
+                        f.write('\n    ]\n  },' if not first_item else ']\n  },')
+                    current = tdl
+                    first_item = True
+                    header = json.dumps({
+                        'identifier': str(tdl.identifier),
+                        'title': tdl.title,
+                        'description': tdl.description,
+                    }, indent=2)
+                    f.write('\n' + textwrap.indent(header[:-2], '  ') + ',\n    "items": [')
+                if item is not None:
+                    f.write('\n' if first_item else ',\n')
+                    f.write(_indented_item(item))
+                    first_item = False
+            if current is not None:
+                f.write('\n    ]\n  }\n' if not first_item else ']\n  }\n')
+            f.write(']')
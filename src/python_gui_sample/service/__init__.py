@@ -0,0 +1,24 @@
+import os
+
+from ..logic import TODOLogic
+from .client import TODOClient, ServiceError
+from .protocol import ProtocolError, SOCKET_ENV, default_socket_path
+from .server import ARCHIVE_AFTER, TODOService
+
+
+def create_logic() -> TODOLogic | TODOClient:
+    """Connect to the shared TODO service if configured, otherwise use local logic."""
+    if os.environ.get(SOCKET_ENV):
+        return TODOClient(default_socket_path())
+    return TODOLogic(archive_after=ARCHIVE_AFTER)
+
+
+__all__ = [
+    "TODOClient",
+    "TODOService",
+    "ServiceError",
+    "ProtocolError",
+    "SOCKET_ENV",
+    "default_socket_path",
+    "create_logic",
+]
@@ -0,0 +1,267 @@
+import datetime
+import itertools
+import pathlib
+import queue
+import socket
+import threading
+import uuid
+
+from ..logic import MergeSummary
+from ..model import ListStats, ListSummary, TODOList, TODOItem
+from . import protocol
+
+# This file contains the client side of the TODO service. TODOClient mirrors the
+# public API of TODOLogic, so front-ends and scripts can use it as a drop-in
+# replacement while the data lives in a shared server process. Calls borrow a
+# connection from a small pool, so the client can be used from several threads
+# at once, and pipeline() sends a batch of calls before reading any response.
+# Change notifications arrive on a dedicated connection and are delivered to the
+# subscribed callbacks from a background thread. The service fires due items
+# itself and pushes them on the same connection; fire_due() returns the items
+# pushed since its last call.
+
+
+class ServiceError(Exception):
+    pass
+
+
+class _Connection:
+
+    def __init__(self, socket_path: pathlib.Path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(str(socket_path))
+        self.stream = self.sock.makefile("rb")
+        self.ids = itertools.count(1)
+
+    def send(self, op: str, args: dict) -> int:
+        request_id = next(self.ids)
+        self.sock.sendall(protocol.pack({"id": request_id, "op": op, "args": args}))
+        return request_id
+
+    def send_many(self, calls: list[tuple[str, dict]]) -> list[int]:
+        request_ids = []
+        frames = []
+        for op, args in calls:
+            request_id = next(self.ids)
+            request_ids.append(request_id)
+            frames.append(protocol.pack({"id": request_id, "op": op, "args": args}))
+        self.sock.sendall(b"".join(frames))
+        return request_ids
+
+    def receive(self) -> dict:
+        header = self.stream.read(protocol.HEADER.size)
+        if len(header) < protocol.HEADER.size:
+            raise ConnectionError("Connection closed by the TODO service")
+        size = protocol.unpack_header(header)
+        body = self.stream.read(size)
+        if len(body) < size:
+            raise ConnectionError("Connection closed by the TODO service")
+        return protocol.unpack_body(body)
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+
+class TODOClient:  # pylint: disable=too-many-public-methods
+
+    thread_safe = True
+
+    def __init__(self, socket_path: pathlib.Path | None = None, pool_size: int = 4):
+        self.socket_path = socket_path or protocol.default_socket_path()
+        self._pool: queue.LifoQueue[_Connection] = queue.LifoQueue(maxsize=pool_size)
+        self._events: _Connection | None = None
+        self._callbacks: list = []
+        self._callbacks_lock = threading.Lock()
+        self._due: list[tuple[uuid.UUID, TODOItem]] = []
+
+    def _acquire(self) -> _Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return _Connection(self.socket_path)
+
+    def _release(self, conn: _Connection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    @staticmethod
+    def _result(response: dict):
+        if "error" in response:
+            raise ServiceError(response["error"])
+        return response.get("ok")
+
+    def call(self, op: str, **args):
+        conn = self._acquire()
+        try:
+            request_id = conn.send(op, args)
+            response = conn.receive()
+        except Exception:
+            conn.close()
+            raise
+        self._release(conn)
+        if response.get("id") != request_id:
+            raise protocol.ProtocolError("Response does not match the request")
+        return self._result(response)
+
+    def pipeline(self, calls: list[tuple[str, dict]]) -> list:
+        conn = self._acquire()
+        try:
+            request_ids = conn.send_many(calls)
+            responses = [conn.receive() for _ in request_ids]
+        except Exception:
+            conn.close()
+            raise
+        self._release(conn)
+        if [r.get("id") for r in responses] != request_ids:
+            raise protocol.ProtocolError("Responses do not match the requests")
+        return [self._result(r) for r in responses]
+
+    def subscribe(self, callback):
+        # callback(op, list_identifier) is invoked from a background thread, op is
+        # "due" (once per list) when items came due, see fire_due()
+        with self._callbacks_lock:
+            self._callbacks.append(callback)
+            self._listen()
+
+    def _listen(self):
+        # Called with the callbacks lock held
+        if self._events is None:
+            self._events = _Connection(self.socket_path)
+            self._events.send("subscribe", {})
+            threading.Thread(target=self._event_loop, args=(self._events,),
+                             daemon=True).start()
+
+    def _event_loop(self, conn: _Connection):
+        try:
+            while True:
+                message = conn.receive()
+                if "event" not in message:
+                    continue
+                if message["event"] == "due":
+                    due = [(entry[0], entry[1]) for entry in message["items"]]
+                    list_identifiers = list(dict.fromkeys(key for key, _ in due))
+                else:
+                    due = []
+                    list_identifiers = [message.get("list")]
+                with self._callbacks_lock:
+                    self._due.extend(due)
+                    callbacks = list(self._callbacks)
+                for callback in callbacks:
+                    for list_identifier in list_identifiers:
+                        callback(message["event"], list_identifier)
+        except (ConnectionError, OSError, ValueError):
+            pass
+
+    def close(self):
+        with self._callbacks_lock:
+            if self._events is not None:
+                self._events.sock.shutdown(socket.SHUT_RDWR)
+                self._events.close()
+                self._events = None
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # TODOLogic API
+
+    @property
+    def todo_lists(self) -> dict[uuid.UUID, TODOList]:
+        return {lst.identifier: lst for lst in self.lists()}
+
+    def create_list(self, title, description) -> TODOList:
+        return self.call("create_list", title=title, description=description)
+
+    def delete_list(self, identifier: uuid.UUID):
+        self.call("delete_list", identifier=identifier)
+
+    def clear_lists(self):
+        self.call("clear_lists")
+
+    def update_list(self, identifier: uuid.UUID, title: str, description: str):
+        self.call("update_list", identifier=identifier, title=title, description=description)
+
+    def get_list(self, identifier: uuid.UUID) -> TODOList | None:
+        return self.call("get_list", identifier=identifier)
+
+    def lists(self) -> list[TODOList]:
+        # Every item of every list, list_summaries() is enough for an overview
+        return self.call("lists")
+
+    def list_summaries(self) -> list[ListSummary]:
+        return self.call("list_summaries")
+
+    def items(self, list_identifier: uuid.UUID) -> list[TODOItem]:
+        return self.call("items", list_identifier=list_identifier)
+
+    def snapshot(self) -> dict[uuid.UUID, TODOList]:
+        return self.todo_lists
+
+    def add_item(self, list_identifier, **item_kwargs) -> TODOItem | None:
+        return self.call("add_item", list_identifier=list_identifier, **item_kwargs)
+
+    def delete_item(self, list_identifier: uuid.UUID, item_identifier: uuid.UUID):
+        self.call("delete_item", list_identifier=list_identifier,
+                  item_identifier=item_identifier)
+
+    def update_item(self, list_identifier: uuid.UUID, item_identifier: uuid.UUID, **kwargs):
+        self.call("update_item", list_identifier=list_identifier,
+                  item_identifier=item_identifier, **kwargs)
+
+    def mark_completed(self, list_identifier: uuid.UUID, item_identifier: uuid.UUID):
+        self.call("mark_completed", list_identifier=list_identifier,
+                  item_identifier=item_identifier)
+
+    def mark_incomplete(self, list_identifier: uuid.UUID, item_identifier: uuid.UUID):
+        self.call("mark_incomplete", list_identifier=list_identifier,
+                  item_identifier=item_identifier)
+
+    def total_stats(self) -> ListStats:
+        # Sum the statistics of the lists, the items are not needed for that
+        totals = ListStats()
+        for summary in self.list_summaries():
+            summary.stats.attach(totals)
+        return totals
+
+    def next_due_at(self) -> datetime.datetime | None:
+        return self.call("next_due_at")
+
+    def fire_due(self) -> list[tuple[uuid.UUID, TODOItem]]:
+        # Items pushed by the service since the last call. Every client receives
+        # all due items; the first call only starts listening for them.
+        with self._callbacks_lock:
+            self._listen()
+            due, self._due = self._due, []
+        return due
+
+    def archive_completed(self, now: datetime.datetime | None = None) -> int:
+        return self.call("archive_completed", now=now)
+
+    def archived_count(self, list_identifier: uuid.UUID | None = None) -> int:
+        return self.call("archived_count", list_identifier=list_identifier)
+
+    def archived_items(self, list_identifier: uuid.UUID) -> list[TODOItem]:
+        return self.call("archived_items", list_identifier=list_identifier)
+
+    def restore_archived(self, list_identifier: uuid.UUID,
+                         item_identifiers: set[uuid.UUID] | None = None,
+                         keep: bool = True) -> int:
+        return self.call("restore_archived", list_identifier=list_identifier,
+                         item_identifiers=item_identifiers, keep=keep)
+
+    def export_lists(self, filepath: pathlib.Path, include_archive: bool = False):
+        if filepath:
+            self.call("export_lists", filepath=str(pathlib.Path(filepath).absolute()),
+                      include_archive=include_archive)
+
+    def import_lists(self, filepath: pathlib.Path, merge: bool = False,
+                     prune: bool = True) -> MergeSummary | None:
+        if filepath:
+            result = self.call("import_lists", filepath=str(pathlib.Path(filepath).absolute()),
+                               merge=merge, prune=prune)
+            return MergeSummary(**result) if result else None
+        return None
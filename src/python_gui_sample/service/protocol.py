@@ -0,0 +1,130 @@
+import collections
+import dataclasses
+import datetime
+import json
+import os
+import pathlib
+import struct
+import tempfile
+import uuid
+
+from ..model import ListStats, ListSummary, TODOList, TODOItem
+from ..serializers.json_serializer import (item_from_dict, item_to_dict,
+                                           list_from_dict, list_to_dict)
+
+# This file contains the wire format shared by the TODO service and its clients.
+# Every message is a frame: a 4-byte big-endian length followed by a compact UTF-8
+# JSON body. Requests carry an "id" that is echoed in the response, so a client can
+# send many requests before reading any response (pipelining). Frames without an
+# "id" and with an "event" key are change notifications pushed by the server.
+#
+# Values that JSON cannot represent (UUIDs, datetimes, sets and model objects) are
+# wrapped in single-key objects with a "$" tag and unwrapped on the other side.
+# The server encodes results that reference live lists or items while holding
+# the list's lock and packs them with pack_encoded().
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+
+SOCKET_ENV = "PYGUI_TODO_SOCKET"
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def default_socket_path() -> pathlib.Path:
+    if os.environ.get(SOCKET_ENV):
+        return pathlib.Path(os.environ[SOCKET_ENV])
+    return pathlib.Path(tempfile.gettempdir()) / "pygui-todo.sock"
+
+
+def encode_value(value):
+    if isinstance(value, uuid.UUID):
+        return {"$u": str(value)}
+    if isinstance(value, datetime.datetime):
+        return {"$d": value.isoformat()}
+    if isinstance(value, (set, frozenset)):
+        return {"$s": [encode_value(v) for v in value]}
+    if isinstance(value, TODOList):
+        return {"$l": list_to_dict(value)}
+    if isinstance(value, TODOItem):
+        return {"$i": item_to_dict(value)}
+    if isinstance(value, ListSummary):
+        return {"$h": _summary_to_dict(value)}
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return encode_value(dataclasses.asdict(value))
+    if isinstance(value, (list, tuple)):
+        return [encode_value(v) for v in value]
+    if isinstance(value, dict):
+        return {key: encode_value(v) for key, v in value.items()}
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, list):
+        return [decode_value(v) for v in value]
+    if isinstance(value, dict):
+        if len(value) == 1:
+            tag, raw = next(iter(value.items()))
+            if tag == "$u":
+                return uuid.UUID(raw)
+            if tag == "$d":
+                return datetime.datetime.fromisoformat(raw)
+            if tag == "$s":
+                return {decode_value(v) for v in raw}
+            if tag == "$l":
+                return list_from_dict(raw)
+            if tag == "$i":
+                return item_from_dict(raw)
+            if tag == "$h":
+                return _summary_from_dict(raw)
+        return {key: decode_value(v) for key, v in value.items()}
+    return value
+
+
+def _summary_to_dict(summary: ListSummary) -> dict:
+    stats = summary.stats
+    return {
+        "identifier": str(summary.identifier),
+        "title": summary.title,
+        "description": summary.description,
+        "open": stats.open,
+        "completed": stats.completed,
+        # JSON object keys are strings, the counters are sent as pairs
+        "priorities": list(stats.priorities.items()),
+        "due_dates": [[due_at.isoformat(), count] for due_at, count in stats.due_dates.items()],
+    }
+
+
+def _summary_from_dict(data: dict) -> ListSummary:
+    stats = ListStats(
+        open=data["open"],
+        completed=data["completed"],
+        priorities=collections.Counter(dict(data["priorities"])),
+        due_dates=collections.Counter({datetime.datetime.fromisoformat(value): count
+                                       for value, count in data["due_dates"]}),
+    )
+    return ListSummary(uuid.UUID(data["identifier"]), data["title"], data["description"], stats)
+
+
+def pack(message: dict) -> bytes:
+    return pack_encoded(encode_value(message))
+
+
+def pack_encoded(message: dict) -> bytes:
+    # The values of message went through encode_value already
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+
+def unpack_header(header: bytes) -> int:
+    (size,) = HEADER.unpack(header)
+    if size > MAX_FRAME_SIZE:
+        raise ProtocolError(f"Frame of {size} bytes exceeds the limit")
+    return size
+
+
+def unpack_body(body: bytes) -> dict:
+    return decode_value(json.loads(body.decode("utf-8")))
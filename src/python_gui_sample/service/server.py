@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import functools
+import pathlib
+import uuid
+
+from ..logic import TODOLogic
+from ..model import TODOItem, TODOList
+from . import protocol
+
+# Completed items older than this are archived (see TODOLogic.archive_completed)
+ARCHIVE_AFTER = datetime.timedelta(days=30)
+
+# This file contains the asyncio server that exposes a single in-memory TODOLogic
+# to many local clients over a Unix socket. Requests on one connection are handled
+# in the order they arrive and may be pipelined. The operations themselves run in
+# a thread pool, never on the event loop: they take the blocking locks of the
+# thread-safe logic, and an import holds a list's write lock for the whole merge,
+# which would otherwise stall every connection. Results are encoded there too:
+# lists and items returned by the logic are live objects that other operations
+# keep changing, so they are encoded under their list's read lock. After every
+# change, all connections that subscribed receive an event frame naming the
+# operation and the affected list.
+#
+# lists() sends every item of every list, overviews use list_summaries() and
+# fetch the items of one list at a time.
+#
+# Due items are fired here and not by the clients: the scheduler's heap is shared,
+# so the first client asking would take the due items from everybody else. A task
+# sleeps until the next due date (or the next change) and pushes a "due" event
+# with the items to all subscribers.
+
+QUERY_OPS = frozenset({
+    "get_list", "lists", "list_summaries", "items", "next_due_at", "archived_count",
+    "archived_items", "export_lists",
+})
+CHANGE_OPS = frozenset({
+    "create_list", "delete_list", "clear_lists", "update_list",
+    "add_item", "delete_item", "update_item", "mark_completed", "mark_incomplete",
+    "archive_completed", "restore_archived", "import_lists",
+})
+# Number of operations that can run at once (e.g. reads while an import runs)
+WORKERS = 8
+
+
+class TODOService:
+
+    def __init__(self, socket_path: pathlib.Path, logic: TODOLogic | None = None):
+        self.socket_path = pathlib.Path(socket_path)
+        self.logic = logic or TODOLogic(thread_safe=True, archive_after=ARCHIVE_AFTER)
+        self.subscribers: set[asyncio.StreamWriter] = set()
+        self.server: asyncio.AbstractServer | None = None
+        self.due_changed: asyncio.Event | None = None
+        self.due_task: asyncio.Task | None = None
+        self.executor = concurrent.futures.ThreadPoolExecutor(WORKERS,
+                                                              thread_name_prefix="todo-service")
+
+    async def start(self) -> asyncio.AbstractServer:
+        # A socket file left behind by a service that exited is replaced, one
+        # that accepts connections belongs to a running service
+        try:
+            _, writer = await asyncio.open_unix_connection(str(self.socket_path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            self.socket_path.unlink(missing_ok=True)
+        else:
+            writer.close()
+            await writer.wait_closed()
+            raise FileExistsError(f"A TODO service is already listening on {self.socket_path}")
+        self.server = await asyncio.start_unix_server(self._handle_connection,
+                                                      path=str(self.socket_path))
+        self.due_changed = asyncio.Event()
+        self.due_task = asyncio.create_task(self._fire_due_loop(self.due_changed))
+        return self.server
+
+    async def serve_forever(self):
+        server = self.server or await self.start()
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        if self.due_task is not None:
+            self.due_task.cancel()
+            self.due_task = None
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+            self.socket_path.unlink(missing_ok=True)
+        self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader,
+                                 writer: asyncio.StreamWriter):
+        try:
+            while True:
+                header = await reader.readexactly(protocol.HEADER.size)
+                body = await reader.readexactly(protocol.unpack_header(header))
+                request = protocol.unpack_body(body)
+                writer.write(protocol.pack_encoded(await self._dispatch(request, writer)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, protocol.ProtocolError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, request: dict, writer: asyncio.StreamWriter) -> dict:
+        # Returns the response with its values encoded (see protocol.pack_encoded)
+        request_id = request.get("id")
+        op = request.get("op")
+        args = request.get("args", {})
+        if op == "subscribe":
+            self.subscribers.add(writer)
+            return {"id": request_id, "ok": True}
+        if op not in QUERY_OPS and op not in CHANGE_OPS:
+            return {"id": request_id, "error": f"Unknown operation: {op}"}
+        try:
+            method = getattr(self.logic, op)
+            if "filepath" in args:
+                args["filepath"] = pathlib.Path(args["filepath"])
+            loop = asyncio.get_running_loop()
+            result, encoded = await loop.run_in_executor(
+                self.executor, functools.partial(self._call, method, args)
+            )
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            return {"id": request_id, "error": f"{type(e).__name__}: {e}"}
+        if op in CHANGE_OPS:
+            self._notify(op, args, result)
+            if self.due_changed is not None:
+                self.due_changed.set()
+        return {"id": request_id, "ok": encoded}
+
+    def _call(self, method, args: dict):
+        # Runs in the executor, returns the result and its encoded form
+        result = method(**args)
+        return result, self._encode(result, args.get("list_identifier"))
+
+    def _encode(self, value, list_identifier: uuid.UUID | None = None):
+        if isinstance(value, TODOList):
+            with self.logic.read_locked(value.identifier):
+                return protocol.encode_value(value)
+        if isinstance(value, TODOItem) and list_identifier is not None:
+            with self.logic.read_locked(list_identifier):
+                return protocol.encode_value(value)
+        if isinstance(value, list):
+            return [self._encode(v, list_identifier) for v in value]
+        return protocol.encode_value(value)
+
+    def _fire_due(self) -> list:
+        return [[protocol.encode_value(key), self._encode(item, key)]
+                for key, item in self.logic.fire_due()]
+
+    async def _fire_due_loop(self, changed: asyncio.Event):
+        loop = asyncio.get_running_loop()
+        while True:
+            next_due = await loop.run_in_executor(self.executor, self.logic.next_due_at)
+            timeout = None
+            if next_due is not None:
+                timeout = max((next_due - datetime.datetime.now()).total_seconds(), 0)
+            # A change may add an earlier due date, then the wait starts over
+            try:
+                await asyncio.wait_for(changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            changed.clear()
+            due = await loop.run_in_executor(self.executor, self._fire_due)
+            if due:
+                self._push({"event": "due", "items": due})
+
+    def _notify(self, op: str, args: dict, result):
+        identifier = args.get("list_identifier", args.get("identifier"))
+        if isinstance(result, TODOList):
+            identifier = result.identifier
+        self._push({"event": op, "list": protocol.encode_value(identifier)})
+
+    def _push(self, message: dict):
+        # Values of message are encoded already
+        frame = protocol.pack_encoded(message)
+        for subscriber in list(self.subscribers):
+            if subscriber.is_closing():
+                self.subscribers.discard(subscriber)
+            else:
+                subscriber.write(frame)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve TODO lists to local clients")
+    parser.add_argument("--socket", type=pathlib.Path, default=protocol.default_socket_path(),
+                        help="path of the Unix socket to listen on")
+    args = parser.parse_args()
+    service = TODOService(args.socket)
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    except FileExistsError as e:
+        parser.exit(1, f"{e}\n")
+    finally:
+        # Only a socket this service listened on is removed
+        if service.server is not None:
+            args.socket.unlink(missing_ok=True)
@@ -0,0 +1,84 @@
+import datetime
+
+import pytest
+
+from python_gui_sample.archive import ArchiveStore
+from python_gui_sample.logic import TODOLogic
+from python_gui_sample.model import TODOItem, TODOList
+from python_gui_sample.serializers import JSONSerializer
+
+# Archived items are kept in a file next to the lists. Replacing the lists by
+# an import must only drop the archives of the lists in the imported file.
+
+DAY = datetime.timedelta(days=1)
+
+
+def _archived_logic(path) -> tuple[TODOLogic, TODOList, TODOList]:
+    logic = TODOLogic(archive_after=DAY, archive_path=path)
+    first = logic.create_list("First", "")
+    second = logic.create_list("Second", "")
+    for lst in (first, second):
+        for n in range(3):
+            item = logic.add_item(lst.identifier, title=f"Old {n}")
+            logic.mark_completed(lst.identifier, item.identifier)
+    assert logic.archive_completed(datetime.datetime.now() + 2 * DAY) == 6
+    return logic, first, second
+
+
+def test_replacing_import_keeps_other_archives(tmp_path):
+    logic, first, second = _archived_logic(tmp_path / "archive.json")
+    path = tmp_path / "first.json"
+    replacement = TODOList(title="First", description="", identifier=first.identifier,
+                           items=[TODOItem(title="New")])
+    JSONSerializer().export_data({first.identifier: replacement}, path)
+
+    logic.import_lists(path)
+
+    assert [lst.identifier for lst in logic.lists()] == [first.identifier]
+    assert logic.archived_count(first.identifier) == 0
+    assert logic.archived_count(second.identifier) == 3
+    stored = ArchiveStore(tmp_path / "archive.json")
+    assert stored.count(first.identifier) == 0
+    assert stored.count(second.identifier) == 3
+
+
+def test_archive_without_file():
+    archive = ArchiveStore()
+    archive.add(TODOList(title="", description="").identifier, [TODOItem(title="x")])
+    with pytest.raises(ValueError):
+        archive.save()
+    with pytest.raises(ValueError):
+        archive.load()
+
+
+def test_restored_items_stay_active(tmp_path):
+    logic, first, _ = _archived_logic(tmp_path / "archive.json")
+    later = datetime.datetime.now() + 2 * DAY
+    restored = logic.archived_items(first.identifier)[0]
+
+    assert logic.restore_archived(first.identifier, {restored.identifier}) == 1
+    assert logic.archive_completed(later) == 0
+    assert [item.identifier for item in logic.items(first.identifier)] == [restored.identifier]
+    # Kept active after a restart too
+    reloaded = TODOLogic(archive_after=DAY, archive_path=tmp_path / "archive.json")
+    assert reloaded.archive.kept(first.identifier) == {restored.identifier: restored.completed_at}
+
+    # Completed again, the item is archived like any other
+    logic.mark_incomplete(first.identifier, restored.identifier)
+    logic.mark_completed(first.identifier, restored.identifier)
+    assert logic.archive_completed(later + 2 * DAY) == 1
+    assert logic.archive.kept(first.identifier) == {}
+    assert logic.archived_count(first.identifier) == 3
+
+
+def test_merged_archived_items_are_archived_again(tmp_path):
+    logic, first, _ = _archived_logic(tmp_path / "archive.json")
+    path = tmp_path / "lists.json"
+    logic.export_lists(path, include_archive=True)
+
+    logic.import_lists(path, merge=True)
+
+    # The merge restores the archived items of the file, they are not kept active
+    assert logic.archive.kept(first.identifier) == {}
+    assert logic.archive_completed(datetime.datetime.now() + 2 * DAY) == 6
+    assert logic.archived_count() == 6
@@ -0,0 +1,81 @@
+from python_gui_sample import cli
+from python_gui_sample.logic import TODOLogic
+
+# Outputs of the command line interface are replaced only by complete files,
+# and an output that is also an input is rejected.
+
+
+def _export(path, items: int):
+    logic = TODOLogic()
+    lst = logic.create_list("CLI", "")
+    for n in range(items):
+        logic.add_item(lst.identifier, title=f"Item {n}", priority=n % 6)
+    logic.export_lists(path)
+
+
+def test_convert(tmp_path):
+    _export(tmp_path / "in.json", 100)
+    assert cli.main(["-q", "convert", str(tmp_path / "in.json"), str(tmp_path / "out.csv.gz"),
+                     "-w", "priority <= 1"]) == cli.EXIT_OK
+    imported = TODOLogic()
+    imported.import_lists(tmp_path / "out.csv.gz")
+    assert imported.total_stats().total == 34
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["in.json", "out.csv.gz"]
+
+
+def test_failed_run_keeps_output(tmp_path):
+    _export(tmp_path / "out.json", 10)
+    before = (tmp_path / "out.json").read_bytes()
+    _export(tmp_path / "in.json.gz", 1000)
+    data = (tmp_path / "in.json.gz").read_bytes()
+    (tmp_path / "in.json.gz").write_bytes(data[:len(data) // 2])
+    for argv in (["convert", str(tmp_path / "in.json.gz"), str(tmp_path / "out.json")],
+                 ["query", str(tmp_path / "in.json.gz"), "-o", str(tmp_path / "out.json")],
+                 ["merge", str(tmp_path / "in.json.gz"), "-o", str(tmp_path / "out.json")]):
+        assert cli.main(["-q", *argv]) == cli.EXIT_ERROR
+        assert (tmp_path / "out.json").read_bytes() == before
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["in.json.gz", "out.json"]
+
+
+def test_output_is_input(tmp_path):
+    _export(tmp_path / "todos.json", 10)
+    before = (tmp_path / "todos.json").read_bytes()
+    (tmp_path / "link.json").symlink_to(tmp_path / "todos.json")
+    for argv in (["convert", str(tmp_path / "todos.json"), str(tmp_path / "link.json")],
+                 ["query", str(tmp_path / "todos.json"), "-o", str(tmp_path / "todos.json")],
+                 ["merge", str(tmp_path / "todos.json"), str(tmp_path / "todos.json"),
+                  "-o", str(tmp_path / "link.json")]):
+        assert cli.main(["-q", *argv]) == cli.EXIT_USAGE
+        assert (tmp_path / "todos.json").read_bytes() == before
+
+
+def _damage(path, offset: int):
+    # Flip the bits of a few bytes in the middle of the compressed data
+    data = bytearray(path.read_bytes())
+    for n in range(offset, offset + 16):
+        data[n] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+
+def test_corrupt_input_is_an_error(tmp_path, capsys):
+    for name in ("in.csv.gz", "in.json.gz", "in.csv.xz", "in.json.xz"):
+        _export(tmp_path / name, 1000)
+        _damage(tmp_path / name, (tmp_path / name).stat().st_size // 2)
+        for argv in (["convert", str(tmp_path / name), str(tmp_path / "out.json")],
+                     ["query", str(tmp_path / name), "-c"],
+                     ["merge", str(tmp_path / name), "-o", str(tmp_path / "out.json")]):
+            assert cli.main(["-q", *argv]) == cli.EXIT_ERROR, (name, argv)
+        assert not (tmp_path / "out.json").exists()
+    assert "Traceback" not in capsys.readouterr().err
+
+
+def test_query_counts_items_only(tmp_path, capsys):
+    logic = TODOLogic()
+    lst = logic.create_list("Items", "")
+    logic.add_item(lst.identifier, title="Only")
+    logic.create_list("Empty", "")
+    logic.export_lists(tmp_path / "in.json")
+
+    assert cli.main(["query", str(tmp_path / "in.json"), "-o", str(tmp_path / "out.json")]) \
+        == cli.EXIT_OK
+    assert "Matched 1 of 1 items" in capsys.readouterr().err
@@ -0,0 +1,39 @@
+import pytest
+
+from python_gui_sample.logic import TODOLogic
+
+# A truncated compressed export must fail to import. Reading it as a shorter
+# file would make a merging import with prune=True delete the missing items.
+
+
+def _logic(items: int) -> TODOLogic:
+    logic = TODOLogic()
+    lst = logic.create_list("Compressed", "")
+    for n in range(items):
+        logic.add_item(lst.identifier, title=f"Item {n}", description="x" * 50)
+    return logic
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz"])
+@pytest.mark.parametrize("fmt", [".json", ".csv"])
+def test_round_trip(tmp_path, fmt, suffix):
+    path = tmp_path / f"todos{fmt}{suffix}"
+    logic = _logic(500)
+    logic.export_lists(path)
+    imported = TODOLogic()
+    imported.import_lists(path)
+    assert [item.title for lst in imported.lists() for item in lst.items] == \
+        [item.title for lst in logic.lists() for item in lst.items]
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".bz2", ".xz"])
+@pytest.mark.parametrize("fmt", [".json", ".csv"])
+def test_truncated_file_fails(tmp_path, fmt, suffix):
+    path = tmp_path / f"todos{fmt}{suffix}"
+    logic = _logic(500)
+    logic.export_lists(path)
+    data = path.read_bytes()
+    path.write_bytes(data[:len(data) * 3 // 4])
+    with pytest.raises(EOFError):
+        logic.import_lists(path, merge=True, prune=True)
+    assert sum(len(lst.items) for lst in logic.lists()) == 500
@@ -0,0 +1,43 @@
+import datetime
+import os
+import time
+
+import pytest
+
+from python_gui_sample.diagnostics import MemoryTracker
+from python_gui_sample.logic import TODOLogic
+
+# Soak test of the PySide front-end: refreshing the table 10k times must not
+# retain memory (e.g. a new model per refresh leaked the old one together with
+# its selection model). Runs without a display on the offscreen platform.
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PySide6")
+
+from python_gui_sample.gui_pyside.main import TODOPySideApp  # noqa: E402
+
+CYCLES = 10000
+# A leaked row of the table alone takes more than this after 10k refreshes
+MAX_GROWTH_BYTES = 256 * 1024
+
+
+def test_refresh_table_is_bounded():
+    logic = TODOLogic()
+    now = datetime.datetime.now()
+    for n in range(5):
+        lst = logic.create_list(f"List {n}", "")
+        for m in range(20):
+            logic.add_item(lst.identifier, title=f"Item {m}", priority=m % 6,
+                           due_at=now + datetime.timedelta(days=m - 10))
+    app = TODOPySideApp(logic)
+    tracker = MemoryTracker()
+    started = time.perf_counter()
+    try:
+        growth = tracker.soak(app._refresh_table, cycles=CYCLES)  # pylint: disable=protected-access
+    finally:
+        tracker.stop()
+        app.window.close()
+    elapsed = time.perf_counter() - started
+    print(f"\nMemory growth after {CYCLES} refreshes: {growth / 1024:+,.1f} KiB "
+          f"in {elapsed:.1f} s ({elapsed / CYCLES * 1000:.2f} ms per refresh)")
+    assert growth < MAX_GROWTH_BYTES
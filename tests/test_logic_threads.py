@@ -0,0 +1,98 @@
+import random
+import threading
+
+from python_gui_sample.logic import TODOLogic
+from python_gui_sample.serializers import JSONSerializer
+
+# Stress test of TODOLogic(thread_safe=True): several writer threads edit the
+# lists while others export them. Every update sets the title, description and
+# priority of an item from one version number, so an export, a snapshot or the
+# items() of a list that sees a half-applied update has fields of different
+# versions.
+
+WRITERS = 8
+EXPORTERS = 2
+OPERATIONS = 400
+
+
+def _version(n: int) -> dict:
+    return {"title": f"v{n}", "description": f"v{n}", "priority": n % 6, "tags": {f"v{n}"}}
+
+
+def _check_items(items):
+    for item in items:
+        version = int(item.title[1:])
+        assert (item.description, item.priority, item.tags) == (
+            f"v{version}", version % 6, {f"v{version}"}
+        ), item
+
+
+def _check_consistent(todo_lists):
+    for lst in todo_lists:
+        lst.check_stats()
+        _check_items(lst.items)
+
+
+def _writer(logic: TODOLogic, seed: int, errors: list):
+    rnd = random.Random(seed)
+    try:
+        for n in range(OPERATIONS):
+            lst = rnd.choice(logic.lists())
+            items = logic.items(lst.identifier)
+            operation = rnd.random()
+            if operation < 0.4 or not items:
+                logic.add_item(lst.identifier, **_version(n))
+            elif operation < 0.8:
+                logic.update_item(lst.identifier, rnd.choice(items).identifier, **_version(n))
+            elif operation < 0.9:
+                item = rnd.choice(items)
+                if item.is_completed:
+                    logic.mark_incomplete(lst.identifier, item.identifier)
+                else:
+                    logic.mark_completed(lst.identifier, item.identifier)
+            else:
+                logic.delete_item(lst.identifier, rnd.choice(items).identifier)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        errors.append(e)
+
+
+def _exporter(logic: TODOLogic, path, done: threading.Event, errors: list):
+    try:
+        while not done.is_set():
+            _check_consistent(logic.snapshot().values())
+            for lst in logic.lists():
+                _check_items(logic.items(lst.identifier))
+            logic.export_lists(path)
+            _check_consistent(JSONSerializer().import_data(path).values())
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        errors.append(e)
+
+
+def test_concurrent_writers_and_exports(tmp_path):
+    logic = TODOLogic(thread_safe=True)
+    for i in range(4):
+        logic.create_list(f"List {i}", "")
+    errors: list = []
+    done = threading.Event()
+    writers = [threading.Thread(target=_writer, args=(logic, seed, errors))
+               for seed in range(WRITERS)]
+    exporters = [threading.Thread(target=_exporter,
+                                  args=(logic, tmp_path / f"export{i}.json", done, errors))
+                 for i in range(EXPORTERS)]
+    for thread in writers + exporters:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    for thread in exporters:
+        thread.join()
+
+    assert not errors, errors
+    logic.check_stats()
+    snapshot = logic.snapshot()
+    _check_consistent(snapshot.values())
+    # The snapshot matches the live lists and is independent of them
+    assert {key: [item.identifier for item in lst.items] for key, lst in snapshot.items()} == \
+        {lst.identifier: [item.identifier for item in logic.items(lst.identifier)]
+         for lst in logic.lists()}
+    assert sum(len(lst.items) for lst in snapshot.values()) == logic.total_stats().total
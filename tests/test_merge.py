@@ -0,0 +1,61 @@
+import datetime
+
+import pytest
+
+from python_gui_sample.logic import TODOLogic
+from python_gui_sample.model import TODOItem, TODOList
+from python_gui_sample.serializers import JSONSerializer
+
+# Merging imports: records unchanged since the last import are not decoded again
+# (the existing items are kept), items changed meanwhile are reset to the file,
+# and an item moving to another list stays scheduled.
+
+
+@pytest.mark.parametrize("name", ["todos.json", "todos.csv"])
+def test_unchanged_records_are_kept(tmp_path, name):
+    path = tmp_path / name
+    source = TODOLogic()
+    lst = source.create_list("Merged", "")
+    for n in range(20):
+        source.add_item(lst.identifier, title=f"Item {n}", tags={"a", "b"},
+                        due_at=datetime.datetime(2030, 1, 1 + n))
+    source.export_lists(path)
+
+    logic = TODOLogic()
+    logic.import_lists(path)
+    items = logic.items(lst.identifier)
+    before = list(logic.get_list(lst.identifier).items)
+    assert all(item.record_hash is not None for item in before)
+    logic.update_item(lst.identifier, items[0].identifier, title="Changed")
+
+    summary = logic.import_lists(path, merge=True)
+
+    assert (summary.items_unchanged, summary.items_updated) == (19, 1)
+    after = logic.get_list(lst.identifier).items
+    assert all(new is old for new, old in zip(after, before))
+    assert [item.title for item in after] == [f"Item {n}" for n in range(20)]
+    # The reset item is known again for the next import
+    assert logic.import_lists(path, merge=True).items_unchanged == 20
+    logic.check_stats()
+
+
+def test_moved_item_stays_scheduled(tmp_path):
+    logic = TODOLogic()
+    first = logic.create_list("First", "")
+    second = logic.create_list("Second", "")
+    due_at = datetime.datetime.now() + datetime.timedelta(days=1)
+    item = logic.add_item(first.identifier, title="Moving", due_at=due_at)
+    path = tmp_path / "moved.json"
+    moved = TODOItem(title="Moving", due_at=due_at, identifier=item.identifier)
+    # The list the item moves to is merged first, then the other one drops it
+    JSONSerializer().export_data({
+        second.identifier: TODOList(title="Second", identifier=second.identifier, items=[moved]),
+        first.identifier: TODOList(title="First", identifier=first.identifier),
+    }, path)
+
+    logic.import_lists(path, merge=True)
+
+    assert logic.items(first.identifier) == []
+    assert [it.identifier for it in logic.items(second.identifier)] == [item.identifier]
+    assert logic.next_due_at() == due_at
+    assert logic.fire_due(due_at) == [(second.identifier, moved)]
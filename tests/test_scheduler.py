@@ -0,0 +1,24 @@
+import datetime
+
+from python_gui_sample.logic import TODOLogic
+from python_gui_sample.scheduler import MAX_DUE_TITLES, due_message
+
+# Items that are overdue when loaded all fire at once; the message the front-ends
+# show for them lists a few titles only.
+
+
+def test_due_message_is_capped():
+    logic = TODOLogic()
+    lst = logic.create_list("Overdue", "")
+    past = datetime.datetime.now() - datetime.timedelta(days=1)
+    for n in range(1000):
+        logic.add_item(lst.identifier, title=f"Item {n}", due_at=past)
+    due = logic.fire_due()
+    assert len(due) == 1000
+
+    lines = due_message(due).splitlines()
+
+    assert lines[0] == "Items are due now:"
+    assert lines[1:-1] == [item.title for _, item in due[:MAX_DUE_TITLES]]
+    assert lines[-1] == f"... and {1000 - MAX_DUE_TITLES:,} more"
+    assert due_message(due[:2]).splitlines()[1:] == [item.title for _, item in due[:2]]
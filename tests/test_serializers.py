@@ -0,0 +1,49 @@
+import uuid
+
+from python_gui_sample.logic import TODOLogic
+from python_gui_sample.serializers import CSVSerializer, JSONSerializer
+
+# The importers decode whole columns at once (see serializers/columns.py); the
+# result must be the same as decoding value by value.
+
+
+def _write_csv(path, rows):
+    header = ("list_uuid,list_title,list_description,item_uuid,title,description,"
+              "created_at,completed_at,due_at,priority,tags")
+    path.write_text("\n".join([header, *rows]) + "\n", encoding="utf-8")
+
+
+def test_csv_list_uuid_spellings(tmp_path):
+    list_uuid = uuid.uuid4()
+    rows = [
+        f"{spelling},Work,,{uuid.uuid4()},Item {n},,2025-01-01T00:00:00,,,{n},a;b"
+        for n, spelling in enumerate([str(list_uuid), str(list_uuid).upper(),
+                                      "{" + str(list_uuid) + "}", list_uuid.hex])
+    ]
+    path = tmp_path / "todos.csv"
+    _write_csv(path, rows)
+
+    lists = CSVSerializer().import_data(path)
+    assert list(lists) == [list_uuid]
+    assert [item.title for item in lists[list_uuid].items] == [f"Item {n}" for n in range(4)]
+    lists[list_uuid].check_stats()
+
+    records = list(CSVSerializer().iter_records(path))
+    assert len(records) == 4
+    assert len({id(tdl) for tdl, _ in records}) == 1
+
+
+def test_imported_items_update_statistics(tmp_path):
+    logic = TODOLogic()
+    lst = logic.create_list("Stats", "")
+    for n in range(10):
+        logic.add_item(lst.identifier, title=f"Item {n}", priority=n % 3)
+    for serializer, name in ((CSVSerializer(), "todos.csv"), (JSONSerializer(), "todos.json")):
+        logic.export_lists(tmp_path / name)
+        imported = serializer.import_data(tmp_path / name)[lst.identifier]
+        imported.check_stats()
+        # Items created by the batched decoding are owned by their list
+        imported.items[0].mark_completed()
+        imported.items[1].priority = 5
+        imported.check_stats()
+        assert imported.stats.completed == 1
@@ -0,0 +1,246 @@
+import asyncio
+import datetime
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+from python_gui_sample.service import TODOClient, TODOService
+
+# Tests of the TODO service: a load test reporting requests per second and p99
+# latency (run with -s to see the report), a check that a list locked by a long
+# operation does not stall other clients, checks of pushed change and due events,
+# of results encoded while the lists change and of the socket of a running service.
+
+CLIENT_THREADS = 16
+REQUESTS_PER_THREAD = 300
+ITEMS_PER_LIST = 20
+# Generous bound, the point is to catch requests stuck behind others
+MAX_P99_SECONDS = 0.25
+
+
+async def _shutdown(service):
+    await service.close()
+    # Connections of clients that just closed may still be served
+    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@pytest.fixture(name="service")
+def fixture_service(tmp_path):
+    service = TODOService(tmp_path / "todo.sock")
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(service.start())
+        started.set()
+        loop.run_forever()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    started.wait(5)
+    yield service
+    asyncio.run_coroutine_threadsafe(_shutdown(service), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+
+
+def test_load(service):
+    client = TODOClient(service.socket_path, pool_size=CLIENT_THREADS)
+    lists = [client.create_list(f"List {i}", "") for i in range(4)]
+    # Updates instead of additions keep the size of the responses constant
+    items = {lst.identifier: [client.add_item(lst.identifier, title=f"item {n}")
+                              for n in range(ITEMS_PER_LIST)] for lst in lists}
+    latencies: list[float] = []
+    errors: list = []
+
+    def worker(index: int):
+        lst = lists[index % len(lists)]
+        try:
+            for n in range(REQUESTS_PER_THREAD):
+                started = time.perf_counter()
+                if n % 4 == 0:
+                    item = items[lst.identifier][n % ITEMS_PER_LIST]
+                    client.update_item(lst.identifier, item.identifier, priority=n % 6)
+                else:
+                    client.items(lst.identifier)
+                latencies.append(time.perf_counter() - started)
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(CLIENT_THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    client.close()
+
+    assert not errors, errors
+    assert len(latencies) == CLIENT_THREADS * REQUESTS_PER_THREAD
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(f"\n{len(latencies) / elapsed:,.0f} requests/s, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms")
+    assert p99 < MAX_P99_SECONDS
+    service.logic.check_stats()
+    assert service.logic.total_stats().total == len(lists) * ITEMS_PER_LIST
+
+
+def test_locked_list_does_not_block_others(service):
+    client = TODOClient(service.socket_path)
+    busy = client.create_list("Busy", "")
+    other = client.create_list("Other", "")
+    client.add_item(other.identifier, title="x")
+    # Hold the write lock of one list as a long import would
+    _, lock = service.logic._locked(busy.identifier)  # pylint: disable=protected-access
+    lock.acquire_write()
+    try:
+        result: list = []
+        reader = threading.Thread(target=lambda: result.append(client.items(other.identifier)),
+                                  daemon=True)
+        reader.start()
+        reader.join(2)
+        assert [item.title for item in result[0]] == ["x"]
+        blocked = threading.Thread(target=client.items, args=(busy.identifier,), daemon=True)
+        blocked.start()
+        # Requests of other clients still get through while one waits for the lock
+        result.clear()
+        reader = threading.Thread(target=lambda: result.append(client.get_list(other.identifier)),
+                                  daemon=True)
+        reader.start()
+        reader.join(2)
+        assert len(result) == 1 and [item.title for item in result[0].items] == ["x"]
+    finally:
+        lock.release_write()
+    blocked.join(2)
+    assert not blocked.is_alive()
+    client.close()
+
+
+def _wait_for_subscribers(service, count: int):
+    # The subscription is sent asynchronously, wait until it is registered
+    deadline = time.monotonic() + 2
+    while len(service.subscribers) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_change_events(service):
+    watcher = TODOClient(service.socket_path)
+    events: list = []
+    received = threading.Event()
+
+    def on_change(op, list_identifier):
+        events.append((op, list_identifier))
+        received.set()
+
+    watcher.subscribe(on_change)
+    _wait_for_subscribers(service, 1)
+    editor = TODOClient(service.socket_path)
+    lst = editor.create_list("Shared", "")
+    assert received.wait(2)
+    assert events == [("create_list", lst.identifier)]
+    watcher.close()
+    editor.close()
+
+
+def test_due_items_reach_every_client(service):
+    clients = [TODOClient(service.socket_path) for _ in range(3)]
+    received = [threading.Event() for _ in clients]
+    for client, event in zip(clients, received):
+        client.subscribe(lambda op, list_identifier, event=event: op == "due" and event.set())
+    _wait_for_subscribers(service, len(clients))
+    lst = clients[0].create_list("Due", "")
+    item = clients[0].add_item(lst.identifier, title="soon",
+                               due_at=datetime.datetime.now() + datetime.timedelta(seconds=0.2))
+    for event in received:
+        assert event.wait(2)
+    for client in clients:
+        assert [(key, due.identifier) for key, due in client.fire_due()] == \
+            [(lst.identifier, item.identifier)]
+        assert client.fire_due() == []
+        client.close()
+
+
+def test_results_are_consistent_while_edited(service):
+    client = TODOClient(service.socket_path)
+    lst = client.create_list("Edited", "")
+    items = [service.logic.add_item(lst.identifier, title="v0", description="v0")
+             for _ in range(2000)]
+    done = threading.Event()
+
+    def writer():
+        # Edits in the service process, the title and description of an item
+        # always carry the same version
+        n = 0
+        while not done.is_set():
+            n += 1
+            for item in items:
+                service.logic.update_item(lst.identifier, item.identifier,
+                                          title=f"v{n}", description=f"v{n}")
+
+    thread = threading.Thread(target=writer)
+    # Switch threads often so that reads land in the middle of updates
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    thread.start()
+    try:
+        for _ in range(20):
+            for item in client.get_list(lst.identifier).items:
+                assert item.title == item.description
+    finally:
+        done.set()
+        thread.join()
+        sys.setswitchinterval(interval)
+    client.close()
+
+
+def test_list_summaries(service):
+    client = TODOClient(service.socket_path)
+    lst = client.create_list("Summary", "Items are not sent")
+    now = datetime.datetime.now()
+    for n in range(6):
+        item = client.add_item(lst.identifier, title=f"Item {n}", priority=n % 2,
+                               due_at=now + datetime.timedelta(days=n - 3))
+        if n == 5:
+            client.mark_completed(lst.identifier, item.identifier)
+    [summary] = client.list_summaries()
+    assert (summary.identifier, summary.title, summary.description) == \
+        (lst.identifier, "Summary", "Items are not sent")
+    assert summary.stats == service.logic.get_list(lst.identifier).stats
+    assert (summary.stats.open, summary.stats.completed, summary.stats.overdue(now)) == (5, 1, 3)
+    assert client.total_stats() == service.logic.total_stats()
+    client.close()
+
+
+def test_running_service_keeps_its_socket(service):
+    other = TODOService(service.socket_path)
+    with pytest.raises(FileExistsError):
+        asyncio.run(other.start())
+    asyncio.run(other.close())
+    client = TODOClient(service.socket_path)
+    assert client.lists() == []
+    client.close()
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = tmp_path / "stale.sock"
+    # A socket file without a listener, as left behind by a killed service
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))
+    stale.close()
+
+    async def run():
+        service = TODOService(path)
+        await service.start()
+        await service.close()
+
+    asyncio.run(run())
+    assert not path.exists()
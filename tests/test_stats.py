@@ -0,0 +1,62 @@
+import copy
+import datetime
+import random
+
+from python_gui_sample.model import ListStats, TODOItem, TODOList
+
+# ListStats keeps the due dates in a heap with lazy deletion; overdue() and
+# next_due() must match a recompute from the items for any sequence of changes
+# and of now values (also going back).
+
+START = datetime.datetime(2030, 1, 1)
+
+
+def _due(rnd: random.Random) -> datetime.datetime | None:
+    return START + datetime.timedelta(hours=rnd.randrange(100)) if rnd.random() < 0.8 else None
+
+
+def _expected(items, now):
+    due = sorted(item.due_at for item in items if item.due_at and not item.is_completed)
+    return sum(d < now for d in due), next((d for d in due if d >= now), None)
+
+
+def test_due_dates_match_recompute():
+    rnd = random.Random(3)
+    lists = [TODOList(title=f"List {n}") for n in range(3)]
+    totals = ListStats()
+    for lst in lists:
+        lst.stats.attach(totals)
+    now = START
+    for step in range(3000):
+        lst = rnd.choice(lists)
+        operation = rnd.random()
+        if operation < 0.4 or not lst.items:
+            lst.add_item(TODOItem(title=str(step), due_at=_due(rnd)))
+        elif operation < 0.6:
+            rnd.choice(lst.items).due_at = _due(rnd)
+        elif operation < 0.7:
+            item = rnd.choice(lst.items)
+            item.completed_at = None if item.is_completed else now
+        elif operation < 0.85:
+            lst.remove_item(rnd.choice(lst.items))
+        elif operation < 0.9:
+            # Mostly forward, sometimes back
+            now += datetime.timedelta(hours=rnd.randrange(-5, 10))
+        else:
+            lst.stats.detach()
+            lst.stats.attach(totals)
+        for stats, items in ((lst.stats, lst.items),
+                             (totals, [item for each in lists for item in each.items])):
+            assert (stats.overdue(now), stats.next_due(now)) == _expected(items, now)
+    for lst in lists:
+        lst.check_stats()
+    assert totals == ListStats.from_items([item for lst in lists for item in lst.items])
+
+
+def test_copied_item_leaves_statistics_alone():
+    lst = TODOList(title="Copies", items=[TODOItem(title="x")])
+    for copied in (copy.copy(lst.items[0]), copy.deepcopy(lst.items[0])):
+        copied.mark_completed()
+        copied.priority = 3
+        lst.check_stats()
+        assert lst.stats.open == 1